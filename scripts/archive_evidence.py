@@ -0,0 +1,309 @@
+"""Archive large evidence files as independently compressed, seekable blocks.
+
+A JSONL or text artifact is split on line boundaries into blocks of roughly
+BLOCK_SIZE raw bytes. Each block is compressed on its own (gzip members, or
+zstd frames when the `zstandard` package is installed) and appended to
+`<file>.blk.gz` / `<file>.blk.zst`. Concatenated gzip members are still a
+valid gzip stream, so the archive can also be decompressed in one go.
+
+A sidecar `<file>.idx.json` maps record and time ranges (as epoch seconds)
+to the compressed byte range of each block, so a decision can cite a single block and the
+dashboard can fetch it with one HTTP range request.
+"""
+import bisect
+import gzip
+import hashlib
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+
+ARCHIVE_MIN_SIZE = 1 << 20  # Only archive artifacts of at least 1 MiB
+BLOCK_SIZE = 256 << 10  # Raw bytes per compressed block
+ARCHIVE_EXTENSIONS = (".jsonl", ".log", ".txt")
+CODEC_SUFFIXES = {"gzip": ".blk.gz", "zstd": ".blk.zst"}
+INDEX_SUFFIX = ".idx.json"
+TIME_FIELDS = ("ts", "timestamp", "time", "atdatetime")
+
+
+def should_archive(filepath: Path) -> bool:
+    """Whether an artifact is large enough and of a type worth archiving."""
+    name = filepath.name
+    if name.endswith(INDEX_SUFFIX) or any(name.endswith(s) for s in CODEC_SUFFIXES.values()):
+        return False
+    return (
+        filepath.suffix in ARCHIVE_EXTENSIONS
+        and filepath.stat().st_size >= ARCHIVE_MIN_SIZE
+    )
+
+
+def default_codec() -> str:
+    """Prefer zstd when available, fall back to stdlib gzip."""
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd codec requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    # mtime=0 keeps archives byte-for-byte reproducible
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd codec requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def to_epoch(value) -> Optional[float]:
+    """Epoch seconds from a number, numeric string or ISO 8601 timestamp.
+
+    Naive ISO timestamps are taken as UTC. Returns None when the value is
+    not a recognizable time.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        # fromisoformat only accepts a trailing Z from Python 3.11 on
+        parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _record_time(line: bytes) -> Optional[float]:
+    """Extract a record's timestamp as epoch seconds, if present."""
+    try:
+        record = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(record, dict):
+        return None
+    for field in TIME_FIELDS:
+        if field in record and record[field] is not None:
+            return to_epoch(record[field])
+    return None
+
+
+def archive_file(
+    filepath: Path,
+    block_size: int = BLOCK_SIZE,
+    codec: Optional[str] = None
+) -> Dict:
+    """Write the block archive and index next to filepath; return the index."""
+    codec = codec or default_codec()
+    archive_path = filepath.with_name(filepath.name + CODEC_SUFFIXES[codec])
+    index_path = filepath.with_name(filepath.name + INDEX_SUFFIX)
+    parse_times = filepath.suffix == ".jsonl"
+
+    sha256 = hashlib.sha256()
+    blocks: List[Dict] = []
+    pending: List[bytes] = []
+    pending_size = 0
+    raw_offset = 0
+    record = 0
+    offset = 0
+    t_min = t_max = None
+
+    with filepath.open("rb") as src, archive_path.open("wb") as out:
+        def flush():
+            nonlocal pending, pending_size, raw_offset, offset, t_min, t_max
+            raw = b"".join(pending)
+            compressed = _compress(raw, codec)
+            out.write(compressed)
+            blocks.append({
+                "offset": offset,
+                "length": len(compressed),
+                "raw_offset": raw_offset,
+                "raw_length": len(raw),
+                "first_record": record - len(pending),
+                "records": len(pending),
+                "t_min": t_min,
+                "t_max": t_max,
+            })
+            offset += len(compressed)
+            raw_offset += len(raw)
+            pending, pending_size = [], 0
+            t_min = t_max = None
+
+        for line in src:
+            sha256.update(line)
+            pending.append(line)
+            pending_size += len(line)
+            record += 1
+
+            if parse_times:
+                ts = _record_time(line)
+                if ts is not None:
+                    t_min = ts if t_min is None or ts < t_min else t_min
+                    t_max = ts if t_max is None or ts > t_max else t_max
+
+            if pending_size >= block_size:
+                flush()
+        if pending:
+            flush()
+
+    index = {
+        "schema": "mirror.evidence-index.v1",
+        "source": filepath.name,
+        "sha256": sha256.hexdigest(),
+        "size": raw_offset,
+        "records": record,
+        "codec": codec,
+        "archive": archive_path.name,
+        "blocks": blocks,
+    }
+    index_path.write_text(json.dumps(index, indent=2))
+    return index
+
+
+def load_index(index_path: Path) -> Dict:
+    """Load a sidecar index written by archive_file."""
+    return json.loads(Path(index_path).read_text())
+
+
+def find_blocks(
+    index: Dict,
+    record: Optional[int] = None,
+    start_time=None,
+    end_time=None
+) -> List[Dict]:
+    """Return the blocks holding a record number or overlapping a time range.
+
+    Times may be epoch numbers or ISO 8601 strings. A bound that is not a
+    recognizable time matches nothing; blocks without usable times are skipped.
+    """
+    blocks = index["blocks"]
+    if record is not None:
+        starts = [b["first_record"] for b in blocks]
+        i = bisect.bisect_right(starts, record) - 1
+        if i >= 0 and record < blocks[i]["first_record"] + blocks[i]["records"]:
+            return [blocks[i]]
+        return []
+
+    start = to_epoch(start_time) if start_time is not None else None
+    end = to_epoch(end_time) if end_time is not None else None
+    if (start_time is not None and start is None) or (end_time is not None and end is None):
+        return []
+
+    matches = []
+    for block in blocks:
+        # to_epoch also covers indexes written before times were normalized
+        t_min, t_max = to_epoch(block["t_min"]), to_epoch(block["t_max"])
+        if t_min is None or t_max is None:
+            continue
+        if end is not None and t_min > end:
+            continue
+        if start is not None and t_max < start:
+            continue
+        matches.append(block)
+    return matches
+
+
+def byte_range(block: Dict) -> Tuple[int, int]:
+    """Inclusive compressed byte range of a block, as used by HTTP Range."""
+    return block["offset"], block["offset"] + block["length"] - 1
+
+
+def cite(index: Dict, archive_url: str, **query) -> List[str]:
+    """Evidence references for a decision, one per matching block.
+
+    Each reference is the archive URL with a fragment naming the exact
+    compressed byte range and record range, e.g.
+    `.../mqtt.jsonl.blk.gz#bytes=0-40211&records=0-1499`.
+    """
+    refs = []
+    for block in find_blocks(index, **query):
+        start, end = byte_range(block)
+        first = block["first_record"]
+        last = first + block["records"] - 1
+        refs.append(f"{archive_url}#bytes={start}-{end}&records={first}-{last}")
+    return refs
+
+
+def read_block(index_path: Path, block: Dict, index: Optional[Dict] = None) -> bytes:
+    """Read and decompress a single block without touching the rest."""
+    index_path = Path(index_path)
+    index = index or load_index(index_path)
+    with index_path.with_name(index["archive"]).open("rb") as f:
+        f.seek(block["offset"])
+        return _decompress(f.read(block["length"]), index["codec"])
+
+
+def _evidence_query(fragment: str, window: Optional[Dict]) -> Optional[Dict]:
+    """Block query from an evidence fragment or a decision time window.
+
+    Fragments are `record=N` or `time=START..END`; without one, the
+    decision's `window` ({"start": ..., "end": ...}) is used.
+    """
+    for part in fragment.split("&") if fragment else []:
+        key, _, value = part.partition("=")
+        if key == "record" and value.isdigit():
+            return {"record": int(value)}
+        if key == "time" and ".." in value:
+            start, _, end = value.partition("..")
+            return {"start_time": start or None, "end_time": end or None}
+    if window and (window.get("start") is not None or window.get("end") is not None):
+        return {"start_time": window.get("start"), "end_time": window.get("end")}
+    return None
+
+
+def cite_evidence(evidence: List[str], base_dir: Path, window: Optional[Dict] = None) -> List[str]:
+    """Replace references to archivable evidence with exact block citations.
+
+    Evidence paths are relative to base_dir. Large artifacts are archived on
+    first use; references without a record or time query, or whose query
+    matches no block, are kept as they are.
+    """
+    cited = []
+    for ref in evidence:
+        path, _, fragment = ref.partition("#")
+        query = _evidence_query(fragment, window)
+        source = base_dir / path
+        index_path = source.with_name(source.name + INDEX_SUFFIX)
+        if query is None or not source.is_file():
+            cited.append(ref)
+            continue
+
+        if index_path.exists():
+            index = load_index(index_path)
+        elif should_archive(source):
+            index = archive_file(source)
+        else:
+            cited.append(ref)
+            continue
+
+        archive_ref = str(Path(path).with_name(index["archive"]).as_posix())
+        cited.extend(cite(index, archive_ref, **query) or [ref])
+    return cited
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python archive_evidence.py <file> [--gzip|--zstd]")
+        sys.exit(1)
+
+    codec = "gzip" if "--gzip" in sys.argv else "zstd" if "--zstd" in sys.argv else None
+    index = archive_file(Path(sys.argv[1]), codec=codec)
+    print(f"✓ Archived {index['source']}: {index['records']} records in {len(index['blocks'])} {index['codec']} blocks")
@@ -26,6 +26,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from archive_evidence import cite_evidence
+
 
 def hash_file(filepath: Path) -> str:
     """Calculate SHA256 hash of a file."""
@@ -77,22 +79,34 @@ def load_coverage(mirror_dir: Path) -> Dict[str, float]:
                     })
             
             # Return coverage with by_requirement array
-            return {
+            coverage = {
                 'requirement': data.get('quadrants', {}).get('requirement', 0.0),
                 'temporal': data.get('quadrants', {}).get('temporal', 0.0),
                 'interface': data.get('quadrants', {}).get('interface', 0.0),
                 'risk': data.get('quadrants', {}).get('risk', 0.0),
                 'by_requirement': by_requirement
             }
+            
+            return attach_code_coverage(coverage, mirror_dir)
     
     # Return minimal coverage if not found
-    return {
+    return attach_code_coverage({
         'requirement': 0.0,
         'temporal': 0.0,
         'interface': 0.0,
         'risk': 0.0,
         'by_requirement': []
-    }
+    }, mirror_dir)
+
+
+def attach_code_coverage(coverage: Dict[str, Any], mirror_dir: Path) -> Dict[str, Any]:
+    """Add per-requirement code coverage written by coverage_by_requirement.py"""
+    for code_path in (mirror_dir / 'requirement_coverage.json', Path('reports/requirement_coverage.json')):
+        if code_path.exists():
+            with open(code_path) as f:
+                coverage['code'] = json.load(f)
+            break
+    return coverage
 
 
 def load_decisions(mirror_dir: Path) -> List[Dict[str, Any]]:
@@ -105,6 +119,16 @@ def load_decisions(mirror_dir: Path) -> List[Dict[str, Any]]:
     return []
 
 
+def cite_archived_evidence(decisions: List[Dict[str, Any]], mirror_dir: Path) -> List[Dict[str, Any]]:
+    """Point evidence in large JSONL/text artifacts at exact archive blocks."""
+    for decision in decisions:
+        if decision.get('evidence'):
+            decision['evidence'] = cite_evidence(
+                decision['evidence'], mirror_dir, decision.get('window')
+            )
+    return decisions
+
+
 def collect_artifacts(mirror_dir: Path) -> List[Dict[str, str]]:
     """Collect and hash artifact files."""
     artifacts = []
@@ -159,7 +183,7 @@ def build_payload(mirror_dir: Path = Path('.mirror/report')) -> Dict[str, Any]:
     ci_meta = get_ci_metadata()
     manifest = load_manifest(mirror_dir)
     coverage = load_coverage(mirror_dir)
-    decisions = load_decisions(mirror_dir)
+    decisions = cite_archived_evidence(load_decisions(mirror_dir), mirror_dir)
     
     # Enhance manifest with collected artifacts
     collected_artifacts = collect_artifacts(mirror_dir)
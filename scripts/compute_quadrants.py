@@ -3,6 +3,7 @@ import xml.etree.ElementTree as ET
 from collections import Counter, defaultdict
 import json
 import sys
+from typing import Iterable
 
 
 def extract_markers(testcase: ET.Element) -> set[str]:
@@ -15,29 +16,32 @@ def extract_markers(testcase: ET.Element) -> set[str]:
             marks.update(prop.attrib.get("value", "").split(","))
     
     # Fallback: infer from classname/name
-    text = (
-        testcase.attrib.get("classname", "") + 
-        "::" + 
+    marks.update(infer_markers(
+        testcase.attrib.get("classname", ""),
         testcase.attrib.get("name", "")
-    ).lower()
-    
-    for marker in ("interface", "temporal", "risk", "requirement"):
-        if marker in text:
-            marks.add(marker)
+    ))
     
     return marks
 
 
-def compute_quadrants(junit_path: str) -> dict:
-    """Parse junit.xml and compute coverage quadrants."""
-    tree = ET.parse(junit_path)
-    
+def infer_markers(classname: str, name: str) -> set[str]:
+    """Infer quadrant markers from a test's classname/name."""
+    text = (classname + "::" + name).lower()
+    return {
+        marker
+        for marker in ("interface", "temporal", "risk", "requirement")
+        if marker in text
+    }
+
+
+def count_testcases(testcases: Iterable[ET.Element]) -> dict:
+    """Raw (un-normalized) quadrant and requirement counts for testcases."""
     total = 0
     passed = 0
     quadrants = Counter()
     by_requirement = defaultdict(lambda: {"pass": 0, "fail": 0})
     
-    for testcase in tree.iter("testcase"):
+    for testcase in testcases:
         total += 1
         
         # Check if test failed
@@ -68,6 +72,36 @@ def compute_quadrants(junit_path: str) -> dict:
                 by_requirement[req_id][status] += 1
                 quadrants["requirement"] += 1
     
+    return {
+        "total": total,
+        "passed": passed,
+        "quadrants": dict(quadrants),
+        "requirements": dict(by_requirement),
+    }
+
+
+def merge_counts(a: dict, b: dict) -> dict:
+    """Combine raw counts from two shards (associative and commutative)."""
+    requirements = {req_id: dict(counts) for req_id, counts in a["requirements"].items()}
+    for req_id, counts in b["requirements"].items():
+        merged = requirements.setdefault(req_id, {"pass": 0, "fail": 0})
+        merged["pass"] += counts["pass"]
+        merged["fail"] += counts["fail"]
+    
+    return {
+        "total": a["total"] + b["total"],
+        "passed": a["passed"] + b["passed"],
+        "quadrants": dict(Counter(a["quadrants"]) + Counter(b["quadrants"])),
+        "requirements": requirements,
+    }
+
+
+def normalize_counts(counts: dict) -> dict:
+    """Turn raw counts into normalized quadrant scores [0..1]."""
+    total = counts["total"]
+    passed = counts["passed"]
+    quadrants = counts["quadrants"]
+    
     # Compute normalized scores [0..1]
     pass_rate = passed / total if total > 0 else 0.0
     
@@ -81,10 +115,16 @@ def compute_quadrants(junit_path: str) -> dict:
             "interface": quadrants.get("interface", 0) / total if total > 0 else 0.0,
             "risk": quadrants.get("risk", 0) / total if total > 0 else 0.5,
         },
-        "requirements": dict(by_requirement),
+        "requirements": dict(counts["requirements"]),
     }
 
 
+def compute_quadrants(junit_path: str) -> dict:
+    """Parse junit.xml and compute coverage quadrants."""
+    tree = ET.parse(junit_path)
+    return normalize_counts(count_testcases(tree.iter("testcase")))
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python compute_quadrants.py <junit.xml>")
@@ -0,0 +1,214 @@
+"""Attribute code coverage to requirements and interfaces.
+
+Streams a Cobertura coverage.xml with iterparse (elements are cleared as
+soon as they are counted, so memory grows with the number of files, not
+lines) and joins it with the per-test contexts that pytest-cov records in
+the .coverage database when run with `--cov-context=test`.
+
+For each requirement, the relevant code is every product file executed by
+the tests linked to it (see trace_requirements.py); the rate is the share
+of executable lines in those files that those tests actually hit. Test
+files themselves (every file the trace index scanned, plus conftest.py)
+are left out, so the rate measures product code exercised, not test code
+run. Interfaces are aggregated the same way.
+
+Usage:
+    python scripts/coverage_by_requirement.py [coverage.xml] [.coverage] [output.json]
+"""
+import json
+import os
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from trace_requirements import TraceIndex, build_index
+
+
+COVERAGE_XML = Path("reports/coverage.xml")
+COVERAGE_DB = Path(".coverage")
+OUTPUT_FILE = Path("reports/requirement_coverage.json")
+
+
+def parse_cobertura(xml_path: Path) -> Tuple[List[str], Dict[str, Tuple[int, int]]]:
+    """Return source roots and {filename: (lines_valid, lines_hit)}."""
+    sources: List[str] = []
+    files: Dict[str, Tuple[int, int]] = {}
+    pending: List[Tuple[int, int]] = []
+
+    for _, elem in ET.iterparse(xml_path):
+        tag = elem.tag
+        if tag == "lines":
+            # At most one class worth of <line> elements is held at a time
+            hit = sum(1 for line in elem if line.get("hits", "0") != "0")
+            pending.append((len(elem), hit))
+            elem.clear()
+        elif tag == "method":
+            # Per-method listings duplicate the class lines; a method's
+            # <lines> always ends right before the method itself
+            if pending:
+                pending.pop()
+        elif tag == "class":
+            # A file may be split over several <class> elements
+            filename = elem.get("filename", "")
+            valid, hit = files.get(filename, (0, 0))
+            files[filename] = (
+                valid + sum(v for v, _ in pending),
+                hit + sum(h for _, h in pending),
+            )
+            pending = []
+            elem.clear()
+        elif tag == "source":
+            sources.append((elem.text or "").strip())
+        elif tag == "package":
+            elem.clear()
+
+    return sources, files
+
+
+def _relative(path: str, sources: List[str], known: Dict) -> Optional[str]:
+    """Map an absolute path from the coverage db onto a coverage.xml filename."""
+    if path in known:
+        return path
+    for source in sources:
+        if source:
+            rel = os.path.relpath(path, source)
+            if rel in known:
+                return rel
+    return None
+
+
+def _test_tree_files(files: Dict, sources: List[str], index: TraceIndex) -> Set[str]:
+    """coverage.xml filenames that belong to the test tree, not the product."""
+    scanned = {
+        os.path.normpath(test["file"])
+        for test in index.tests.values() if test.get("file")
+    }
+    excluded = set()
+    for filename in files:
+        candidates = [filename] + [os.path.relpath(os.path.join(s, filename)) for s in sources if s]
+        if Path(filename).name == "conftest.py" or any(
+            os.path.normpath(c) in scanned for c in candidates
+        ):
+            excluded.add(filename)
+    return excluded
+
+
+def context_test_id(context: str) -> Optional[str]:
+    """Turn a pytest-cov context (`tests/test_x.py::test_y|run`) into a test id."""
+    node = context.split("|", 1)[0]
+    if "::" not in node:
+        return None
+    path, _, rest = node.partition("::")
+    module = path[:-3] if path.endswith(".py") else path
+    # Drop parametrization, which junit ids carry in the name instead
+    rest = rest.split("[", 1)[0]
+    return ".".join([*Path(module).parts, *rest.split("::")])
+
+
+def accumulate_context_lines(
+    db_path: Path,
+    sources: List[str],
+    files: Dict,
+    index: TraceIndex
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, int]]]:
+    """Stream a coverage.py database into requirement and interface groups.
+
+    Each line_bits row is OR-ed straight into the groups of its test, so
+    memory grows with (requirements + interfaces) x files, never with the
+    number of tests.
+    """
+    by_requirement: Dict[str, Dict[str, int]] = defaultdict(dict)
+    by_interface: Dict[str, Dict[str, int]] = defaultdict(dict)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        paths = {
+            file_id: _relative(path, sources, files)
+            for file_id, path in conn.execute("SELECT id, path FROM file")
+        }
+        # Resolve each context to its target groups once, up front
+        targets: Dict[int, List[Dict[str, int]]] = {}
+        for ctx_id, ctx in conn.execute("SELECT id, context FROM context"):
+            test = index.tests.get(context_test_id(ctx) or "", {})
+            groups = [by_requirement[r] for r in test.get("requirements", [])]
+            groups += [by_interface[i] for i in test.get("interface", [])]
+            if groups:
+                targets[ctx_id] = groups
+
+        for file_id, ctx_id, numbits in conn.execute(
+            "SELECT file_id, context_id, numbits FROM line_bits"
+        ):
+            groups, filename = targets.get(ctx_id), paths.get(file_id)
+            if groups is None or filename is None:
+                continue
+            # coverage.py numbits: bit n of the little-endian blob is line n
+            bits = int.from_bytes(numbits, "little")
+            for group in groups:
+                group[filename] = group.get(filename, 0) | bits
+    finally:
+        conn.close()
+
+    return by_requirement, by_interface
+
+
+def _rates(groups: Dict[str, Dict[str, int]], files: Dict[str, Tuple[int, int]]) -> List[Dict]:
+    rows = []
+    for key, file_bits in sorted(groups.items()):
+        covered = sum(bits.bit_count() for bits in file_bits.values())
+        total = sum(files[f][0] for f in file_bits)
+        rows.append({
+            "id": key,
+            "files": len(file_bits),
+            "lines_covered": covered,
+            "lines_total": total,
+            "rate": round(min(covered / total, 1.0), 3) if total else 0.0,
+        })
+    return rows
+
+
+def attribute_coverage(
+    xml_path: Path = COVERAGE_XML,
+    db_path: Path = COVERAGE_DB,
+    index: Optional[TraceIndex] = None
+) -> Dict:
+    """Compute code coverage of product files per requirement and interface."""
+    index = index or TraceIndex(build_index())
+    sources, files = parse_cobertura(xml_path)
+    for filename in _test_tree_files(files, sources, index):
+        del files[filename]
+    lines_valid = sum(valid for valid, _ in files.values())
+    lines_hit = sum(hit for _, hit in files.values())
+    result = {
+        "line_rate": round(lines_hit / lines_valid, 3) if lines_valid else 0.0,
+        "by_requirement": [],
+        "by_interface": [],
+    }
+
+    if not db_path.exists():
+        print(f"⚠ {db_path} not found; run pytest with --cov-context=test for per-requirement coverage")
+        return result
+
+    by_requirement, by_interface = accumulate_context_lines(db_path, sources, files, index)
+
+    result["by_requirement"] = _rates(by_requirement, files)
+    result["by_interface"] = _rates(by_interface, files)
+    return result
+
+
+if __name__ == "__main__":
+    xml_path = Path(sys.argv[1]) if len(sys.argv) > 1 else COVERAGE_XML
+    db_path = Path(sys.argv[2]) if len(sys.argv) > 2 else COVERAGE_DB
+    output = Path(sys.argv[3]) if len(sys.argv) > 3 else OUTPUT_FILE
+
+    if not xml_path.exists():
+        print("Usage: python coverage_by_requirement.py [coverage.xml] [.coverage] [output.json]")
+        sys.exit(1)
+
+    code = attribute_coverage(xml_path, db_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(code, indent=2))
+    print(f"✓ Requirement code coverage written: {output}")
+    print(f"  Line rate {code['line_rate']:.1%}, {len(code['by_requirement'])} requirements, {len(code['by_interface'])} interfaces")
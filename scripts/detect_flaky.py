@@ -4,79 +4,150 @@ import os
 import xml.etree.ElementTree as ET
 from collections import deque, defaultdict
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 
 
 HISTORY_FILE = Path("reports/test_history.json")
 FLAKY_FILE = Path("reports/flaky_tests.json")
+RERUN_HISTORY_FILE = Path("reports/rerun_history.json")
+SHARDS_FILE = Path("reports/shards.json")
+SHARD_SEPARATOR = "::"  # `<shard>::<test_id>` keys, see process_shards.py
 WINDOW_SIZE = 10  # Track last N test runs
 
 
-def parse_junit(junit_path: str) -> List[tuple[str, str]]:
-    """Extract test outcomes from junit XML."""
-    tree = ET.parse(junit_path)
+def testcase_outcome(testcase: ET.Element) -> str:
+    """Map a junit <testcase> element to an outcome string."""
+    if testcase.find("failure") is not None:
+        return "fail"
+    if testcase.find("error") is not None:
+        return "error"
+    if testcase.find("skipped") is not None:
+        return "skip"
+    return "pass"
+
+
+def testcase_outcomes(testcases: Iterable[ET.Element]) -> List[tuple[str, str]]:
+    """(test_id, outcome) pairs for junit <testcase> elements."""
     results = []
     
-    for testcase in tree.iter("testcase"):
+    for testcase in testcases:
         classname = testcase.attrib.get("classname", "")
         name = testcase.attrib.get("name", "")
         test_id = f"{classname}.{name}"
         
-        # Determine outcome
-        if testcase.find("failure") is not None:
-            outcome = "fail"
-        elif testcase.find("error") is not None:
-            outcome = "error"
-        elif testcase.find("skipped") is not None:
-            outcome = "skip"
-        else:
-            outcome = "pass"
-        
-        results.append((test_id, outcome))
+        results.append((test_id, testcase_outcome(testcase)))
     
     return results
 
 
-def update_history(junit_path: str) -> Dict[str, List[str]]:
-    """Update test outcome history."""
-    # Load existing history
+def parse_junit(junit_path: str) -> List[tuple[str, str]]:
+    """Extract test outcomes from junit XML."""
+    tree = ET.parse(junit_path)
+    return testcase_outcomes(tree.iter("testcase"))
+
+
+def load_history(path: Path = HISTORY_FILE) -> Dict[str, deque]:
+    """Load stored outcome history, bounded to WINDOW_SIZE per test."""
     history = defaultdict(lambda: deque(maxlen=WINDOW_SIZE))
     
-    if HISTORY_FILE.exists():
-        stored = json.loads(HISTORY_FILE.read_text())
+    if path.exists():
+        stored = json.loads(path.read_text())
         for test_id, outcomes in stored.items():
             history[test_id] = deque(outcomes, maxlen=WINDOW_SIZE)
     
+    return history
+
+
+def save_history(history: Dict[str, deque], path: Path = HISTORY_FILE) -> None:
+    """Persist outcome history."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({k: list(v) for k, v in history.items()}, indent=2)
+    )
+
+
+def update_history(junit_path: str) -> Dict[str, List[str]]:
+    """Update test outcome history."""
+    return record_outcomes(parse_junit(junit_path))
+
+
+def record_outcomes(
+    results: Iterable[tuple[str, str]],
+    path: Path = HISTORY_FILE
+) -> Dict[str, deque]:
+    """Append (test_id, outcome) pairs to the stored history."""
+    history = load_history(path)
+    
     # Add new outcomes
-    for test_id, outcome in parse_junit(junit_path):
+    for test_id, outcome in results:
         history[test_id].append(outcome)
     
-    # Save updated history
-    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-    HISTORY_FILE.write_text(
-        json.dumps({k: list(v) for k, v in history.items()}, indent=2)
-    )
+    save_history(history, path)
     
     return history
 
 
-def detect_flaky(history: Dict[str, deque]) -> Dict[str, float]:
-    """Detect flaky tests based on outcome variability."""
+def load_reruns(path: Path = RERUN_HISTORY_FILE) -> Dict[str, Dict]:
+    """Latest settled rerun batch per test, as written by rerun_flaky.py."""
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def load_shards(path: Path = SHARDS_FILE) -> Dict[str, Dict]:
+    """Shard namespaces and their package roots, as written by process_shards.py."""
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def split_shard(key: str) -> tuple[str, str]:
+    """Split a `<shard>::<test_id>` history key; plain ids have no shard."""
+    shard, sep, test_id = key.rpartition(SHARD_SEPARATOR)
+    return (shard, test_id) if sep else ("", key)
+
+
+def outcomes_since(snapshot: List[str], outcomes: Iterable[str]) -> List[str]:
+    """Outcomes appended to a bounded history after snapshot was taken."""
+    outcomes = list(outcomes)
+    for new in range(len(outcomes) + 1):
+        kept = outcomes[:len(outcomes) - new]
+        if len(kept) <= len(snapshot) and snapshot[len(snapshot) - len(kept):] == kept:
+            return outcomes[len(outcomes) - new:]
+    return outcomes
+
+
+def flip_rate(outcomes: Iterable[str]) -> float:
+    """Ratio of outcome transitions to consecutive run pairs."""
+    outcomes = list(outcomes)
+    if len(outcomes) < 2:
+        return 0.0
+    transitions = sum(1 for a, b in zip(outcomes, outcomes[1:]) if a != b)
+    return transitions / (len(outcomes) - 1)
+
+
+def detect_flaky(
+    history: Dict[str, deque],
+    reruns: Optional[Dict[str, Dict]] = None
+) -> Dict[str, float]:
+    """Detect flaky tests based on outcome variability.
+    
+    A settled rerun batch (see load_reruns) overrides the runs before it: a
+    flaky verdict keeps the test flagged, a stable verdict counts as one
+    run followed by whatever was recorded since.
+    """
     flaky_tests = {}
     
     for test_id, outcomes in history.items():
+        batch = (reruns or {}).get(test_id)
+        if batch and batch["verdict"] == "flaky":
+            flaky_tests[test_id] = round(max(flip_rate(outcomes), batch["flakiness"]), 3)
+            continue
+        if batch and batch["verdict"] in ("pass", "fail"):
+            outcomes = [batch["verdict"], *outcomes_since(batch["history"], outcomes)]
+        
         if len(outcomes) < 4:
             # Need at least 4 runs to detect flakiness
             continue
         
-        # Count transitions between different outcomes
-        transitions = sum(
-            1 for a, b in zip(outcomes, list(outcomes)[1:]) 
-            if a != b
-        )
-        
         # Flakiness score: ratio of transitions to total runs
-        flakiness = transitions / (len(outcomes) - 1)
+        flakiness = flip_rate(outcomes)
         
         # Only flag if flakiness > 20% (i.e., at least 1 flip in 5 runs)
         if flakiness > 0.2:
@@ -93,8 +164,8 @@ def main(junit_path: str):
     history = update_history(junit_path)
     print(f"✓ Updated history for {len(history)} tests")
     
-    # Detect flaky tests
-    flaky = detect_flaky(history)
+    # Detect flaky tests, taking settled reruns into account
+    flaky = detect_flaky(history, load_reruns())
     
     # Save flaky test report
     FLAKY_FILE.write_text(json.dumps(flaky, indent=2))
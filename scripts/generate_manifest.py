@@ -4,8 +4,26 @@ import json
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from archive_evidence import (
+    CODEC_SUFFIXES,
+    INDEX_SUFFIX,
+    archive_file,
+    should_archive,
+)
+from merkle import (
+    HASH_SIZE,
+    build_levels,
+    canonical_entry,
+    diff_entries,
+    leaf_hash,
+    proof_positions,
+    sort_entries,
+    verify_inclusion,
+)
 
 
 def sha256_file(filepath: Path) -> str:
@@ -17,48 +35,166 @@ def sha256_file(filepath: Path) -> str:
     return h.hexdigest()
 
 
+def _is_archive_output(filename: str) -> bool:
+    """Whether a file is a block archive or index written by the archiver."""
+    return filename.endswith(INDEX_SUFFIX) or any(
+        filename.endswith(suffix) for suffix in CODEC_SUFFIXES.values()
+    )
+
+
+def catalog_artifact(filepath: Path, artifacts_path: Path, archive: bool, merkle: bool) -> List[Tuple[Dict, bytes]]:
+    """Hash one artifact (archiving it if requested) into manifest entries."""
+    filename = filepath.name
+    relative_path = filepath.relative_to(artifacts_path)
+    entries = []
+    
+    if archive and should_archive(filepath):
+        index = archive_file(filepath)
+        archive_path = filepath.with_name(index["archive"])
+        index_path = filepath.with_name(filename + INDEX_SUFFIX)
+        entries.append({
+            "name": filename,
+            "path": relative_path.as_posix(),
+            "sha256": index["sha256"],
+            "size": index["size"],
+            "archive": {
+                "path": archive_path.relative_to(artifacts_path).as_posix(),
+                "index": index_path.relative_to(artifacts_path).as_posix(),
+                "codec": index["codec"],
+                "blocks": len(index["blocks"])
+            }
+        })
+        for extra in (archive_path, index_path):
+            entries.append({
+                "name": extra.name,
+                "path": extra.relative_to(artifacts_path).as_posix(),
+                "sha256": sha256_file(extra),
+                "size": extra.stat().st_size
+            })
+    else:
+        entries.append({
+            "name": filename,
+            "path": relative_path.as_posix(),
+            "sha256": sha256_file(filepath),
+            "size": filepath.stat().st_size
+        })
+    
+    # Leaf hashes are computed in the hashing workers, not afterwards
+    return [(entry, leaf_hash(entry) if merkle else b"") for entry in entries]
+
+
+def list_artifacts(artifacts_path: Path, output_name: str, archive: bool, merkle: bool) -> List[Path]:
+    """Files under artifacts_path that belong in the manifest."""
+    files = []
+    
+    # Walk through all files in artifacts directory
+    for root, _, filenames in os.walk(artifacts_path):
+        for filename in filenames:
+            if archive and _is_archive_output(filename):
+                # Cataloged alongside the artifact they were built from
+                continue
+            if merkle and filename.startswith(output_name):
+                # Outputs of a previous run into the same directory
+                continue
+            files.append(Path(root) / filename)
+    
+    return files
+
+
 def generate_manifest(
     artifacts_dir: str,
     output_path: str = "reports/manifest.json",
-    sign: bool = False
+    sign: bool = False,
+    archive: bool = False,
+    merkle: bool = False,
+    workers: Optional[int] = None
 ) -> Dict:
-    """Generate manifest with artifact hashes."""
+    """Generate manifest with artifact hashes.
+
+    With archive=True, large JSONL/text artifacts are additionally stored as
+    seekable compressed blocks (see archive_evidence.py). Their entries keep
+    the SHA256 of the original content and point at the archive and index.
+
+    With merkle=True, entries are sorted by path and committed to by a Merkle
+    root (see merkle.py). Alongside the manifest it writes:
+
+    - `<output>.root`: root hash and leaf count, the only file signed
+    - `<output>.entries.jsonl`: sorted entries padded to one record size
+    - `<output>.tree`: every tree node, so proof hashes are read by offset
+
+    verify_artifact checks one artifact from these in O(log n) reads.
+    """
     artifacts_path = Path(artifacts_dir)
-    entries = []
+    files = list_artifacts(artifacts_path, Path(output_path).name, archive, merkle)
     
-    # Walk through all files in artifacts directory
-    for root, _, files in os.walk(artifacts_path):
-        for filename in files:
-            filepath = Path(root) / filename
-            relative_path = filepath.relative_to(artifacts_path)
-            
-            entries.append({
-                "name": filename,
-                "path": str(relative_path),
-                "sha256": sha256_file(filepath),
-                "size": filepath.stat().st_size
-            })
+    # Hash in parallel; hashlib releases the GIL on large buffers
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        cataloged = [
+            item
+            for items in pool.map(lambda f: catalog_artifact(f, artifacts_path, archive, merkle), files)
+            for item in items
+        ]
     
-    # Build manifest
-    manifest = {
-        "schema": "mirror.manifest.v1",
-        "artifacts": entries
-    }
-    
-    # Write manifest
+    return write_manifest(cataloged, output_path, sign, merkle)
+
+
+def write_manifest(
+    cataloged: List[Tuple[Dict, bytes]],
+    output_path: str,
+    sign: bool = False,
+    merkle: bool = False
+) -> Dict:
+    """Write (and optionally sign) a manifest from (entry, leaf hash) pairs."""
     output = Path(output_path)
     output.parent.mkdir(parents=True, exist_ok=True)
+    
+    if merkle:
+        cataloged.sort(key=lambda item: item[0]["path"])
+        entries = [entry for entry, _ in cataloged]
+        levels = build_levels([leaf for _, leaf in cataloged])
+        root_hash = levels[-1][0].hex()
+        # Pad every entry to the same width so entry i is at i * size
+        records = [canonical_entry(entry) for entry in entries]
+        record_size = max((len(r) for r in records), default=0) + 1
+        with Path(f"{output_path}.entries.jsonl").open("wb") as f:
+            for record in records:
+                f.write(record.ljust(record_size - 1) + b"\n")
+        with Path(f"{output_path}.tree").open("wb") as f:
+            for level in levels:
+                f.write(b"".join(level))
+        Path(f"{output_path}.root").write_text(f"{root_hash} {len(entries)}\n")
+        manifest = {
+            "schema": "mirror.manifest.v2",
+            "merkle": {
+                "algorithm": "sha256",
+                "root": root_hash,
+                "leaf_count": len(entries)
+            },
+            "artifacts": entries
+        }
+    else:
+        entries = [entry for entry, _ in cataloged]
+        manifest = {
+            "schema": "mirror.manifest.v1",
+            "artifacts": entries
+        }
+    
+    # Write manifest
     output.write_text(json.dumps(manifest, indent=2))
     
     print(f"✓ Manifest written: {output_path}")
     print(f"  {len(entries)} artifacts cataloged")
+    if merkle:
+        print(f"  Merkle root: {manifest['merkle']['root']}")
     
     # Optional: Sign with cosign (keyless)
     if sign:
+        # In Merkle mode the root commits to every entry, so sign just that
+        blob = Path(f"{output_path}.root") if merkle else output
         try:
-            sig_path = f"{output_path}.sig"
+            sig_path = f"{blob}.sig"
             subprocess.check_call(
-                ["cosign", "sign-blob", "--yes", "--output-signature", sig_path, str(output)],
+                ["cosign", "sign-blob", "--yes", "--output-signature", sig_path, str(blob)],
                 env={**os.environ, "COSIGN_EXPERIMENTAL": "1"}
             )
             print(f"✓ Signed manifest: {sig_path}")
@@ -69,13 +205,88 @@ def generate_manifest(
     return manifest
 
 
+def _read_entry(f, record_size: int, index: int) -> Dict:
+    f.seek(index * record_size)
+    return json.loads(f.read(record_size))
+
+
+def verify_artifact(manifest_path: str, artifacts_dir: str, path: str) -> bool:
+    """Verify a single artifact against the signed Merkle root in O(log n).
+
+    Only `<manifest>.root` is trusted. The entry is binary-searched in the
+    fixed-size entries file and its proof hashes are read from the tree
+    file by offset; the manifest JSON itself is never loaded.
+    """
+    root_path = Path(f"{manifest_path}.root")
+    if not root_path.exists():
+        print("⚠ Not a Merkle manifest (generate with --merkle)")
+        return False
+    root, leaf_count = root_path.read_text().split()
+    leaf_count = int(leaf_count)
+    
+    with Path(f"{manifest_path}.entries.jsonl").open("rb") as f:
+        record_size = len(f.readline())
+        lo, hi = 0, leaf_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _read_entry(f, record_size, mid)["path"] < path:
+                lo = mid + 1
+            else:
+                hi = mid
+        entry = _read_entry(f, record_size, lo) if lo < leaf_count else None
+    if entry is None or entry["path"] != path:
+        print(f"✗ {path} is not in the manifest")
+        return False
+    index = lo
+    
+    if sha256_file(Path(artifacts_dir) / path) != entry["sha256"]:
+        print(f"✗ {path}: content does not match manifest SHA256")
+        return False
+    
+    proof = []
+    with Path(f"{manifest_path}.tree").open("rb") as f:
+        for position in proof_positions(leaf_count, index):
+            f.seek(position * HASH_SIZE)
+            proof.append(f.read(HASH_SIZE).hex())
+    
+    if not verify_inclusion(entry, index, leaf_count, proof, root):
+        print(f"✗ {path}: inclusion proof does not match signed Merkle root")
+        return False
+    
+    print(f"✓ {path} verified against root {root}")
+    return True
+
+
+def compare_manifests(old_path: str, new_path: str) -> Dict[str, List[str]]:
+    """Diff two manifests; identical Merkle roots short-circuit the walk."""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    return diff_entries(
+        sort_entries(old["artifacts"]),
+        sort_entries(new["artifacts"]),
+        old.get("merkle", {}).get("root"),
+        new.get("merkle", {}).get("root")
+    )
+
+
 if __name__ == "__main__":
+    if len(sys.argv) >= 5 and sys.argv[1] == "--verify":
+        sys.exit(0 if verify_artifact(sys.argv[2], sys.argv[3], sys.argv[4]) else 1)
+    
+    if len(sys.argv) >= 4 and sys.argv[1] == "--diff":
+        print(json.dumps(compare_manifests(sys.argv[2], sys.argv[3]), indent=2))
+        sys.exit(0)
+    
     if len(sys.argv) < 2:
-        print("Usage: python generate_manifest.py <artifacts_dir> [output_path] [--sign]")
+        print("Usage: python generate_manifest.py <artifacts_dir> [output_path] [--sign] [--archive] [--merkle]")
+        print("       python generate_manifest.py --verify <manifest.json> <artifacts_dir> <artifact_path>")
+        print("       python generate_manifest.py --diff <old_manifest.json> <new_manifest.json>")
         sys.exit(1)
     
     artifacts_dir = sys.argv[1]
     output_path = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith("--") else "reports/manifest.json"
     sign = "--sign" in sys.argv
+    archive = "--archive" in sys.argv
+    merkle = "--merkle" in sys.argv
     
-    generate_manifest(artifacts_dir, output_path, sign)
+    generate_manifest(artifacts_dir, output_path, sign, archive, merkle)
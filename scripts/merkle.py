@@ -0,0 +1,132 @@
+"""Merkle tree over canonically sorted manifest entries.
+
+Leaves are SHA256 over a 0x00 prefix and the canonical JSON of an entry;
+interior nodes are SHA256 over a 0x01 prefix and both children (the
+domain separation from RFC 6962). An unpaired node at the end of a level
+is promoted unchanged. Signing the root covers every entry, and a single
+artifact is verified against the root with a log2(n) inclusion proof.
+
+Stored trees are the levels concatenated leaf-first, HASH_SIZE bytes per
+node, so each proof hash is read from a position given by proof_positions.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+HASH_SIZE = 32
+
+
+def canonical_entry(entry: Dict) -> bytes:
+    """Deterministic byte encoding of a manifest entry."""
+    return json.dumps(entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def leaf_hash(entry: Dict) -> bytes:
+    """Hash of a single manifest entry."""
+    return hashlib.sha256(LEAF_PREFIX + canonical_entry(entry)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def sort_entries(entries: List[Dict]) -> List[Dict]:
+    """Canonical entry order: by POSIX path."""
+    return sorted(entries, key=lambda e: e["path"])
+
+
+def build_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """All tree levels, from the leaves up to the single root."""
+    if not leaves:
+        return [[hashlib.sha256(b"").digest()]]
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def level_widths(leaf_count: int) -> List[int]:
+    """Number of nodes on each level, from the leaves up to the root."""
+    widths = [max(leaf_count, 1)]
+    while widths[-1] > 1:
+        widths.append((widths[-1] + 1) // 2)
+    return widths
+
+
+def proof_positions(leaf_count: int, index: int) -> List[int]:
+    """Positions of a leaf's proof hashes in the concatenated levels.
+
+    Sibling hashes run from leaf to root; promoted levels are skipped.
+    """
+    positions = []
+    start = 0
+    for width in level_widths(leaf_count)[:-1]:
+        sibling = index ^ 1
+        if sibling < width:
+            positions.append(start + sibling)
+        start += width
+        index //= 2
+    return positions
+
+
+def verify_inclusion(
+    entry: Dict,
+    index: int,
+    leaf_count: int,
+    proof: List[str],
+    root: str
+) -> bool:
+    """Check that entry sits at index of a tree with the given root."""
+    if not 0 <= index < leaf_count:
+        return False
+    node = leaf_hash(entry)
+    siblings = iter(proof)
+    width = leaf_count
+    while width > 1:
+        sibling = index ^ 1
+        if sibling < width:
+            other = next(siblings, None)
+            if other is None:
+                return False
+            other = bytes.fromhex(other)
+            node = node_hash(other, node) if index % 2 else node_hash(node, other)
+        index //= 2
+        width = (width + 1) // 2
+    return next(siblings, None) is None and node.hex() == root
+
+
+def diff_entries(
+    old: List[Dict],
+    new: List[Dict],
+    old_root: Optional[str] = None,
+    new_root: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """Added, removed and changed paths between two sorted entry lists."""
+    result: Dict[str, List[str]] = {"added": [], "removed": [], "changed": []}
+    if old_root is not None and old_root == new_root:
+        return result
+
+    i = j = 0
+    while i < len(old) or j < len(new):
+        a = old[i] if i < len(old) else None
+        b = new[j] if j < len(new) else None
+        if b is None or (a is not None and a["path"] < b["path"]):
+            result["removed"].append(a["path"])
+            i += 1
+        elif a is None or b["path"] < a["path"]:
+            result["added"].append(b["path"])
+            j += 1
+        else:
+            if canonical_entry(a) != canonical_entry(b):
+                result["changed"].append(a["path"])
+            i += 1
+            j += 1
+    return result
+
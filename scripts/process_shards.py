@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Process many junit/artifact shards in parallel (monorepo mode).
+
+Discovers report files with glob patterns, processes each shard in a
+process pool sized to the available cores and reduces the per-shard results
+with associative merges:
+
+- quadrants: raw counts are summed (compute_quadrants.merge_counts) and
+  normalized once at the end; each shard's own quadrants are kept under
+  "shards" so packages sharing a requirement id stay distinguishable
+- flaky history: history and flaky keys are namespaced by shard
+  (`packages/a::tests.test_smoke.test_addition`, see shard_names) so the
+  same test name in two packages keeps separate histories; shards.json
+  maps every namespace to its package root, which rerun_flaky.py uses to
+  rerun the plain test id from the right directory
+- manifest: every artifact file is hashed as its own task; the Merkle mode
+  sorts entries canonically, so completion order does not matter
+
+Coverage, history, flaky, shard map and manifest files are all written to
+--output-dir.
+
+Usage:
+    python scripts/process_shards.py --junit 'packages/*/reports/junit.xml'
+        [--artifacts 'packages/*/reports'] [--output-dir reports]
+        [--workers N] [--merkle] [--archive] [--sign]
+"""
+import glob
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from compute_quadrants import count_testcases, merge_counts, normalize_counts
+from detect_flaky import (
+    FLAKY_FILE,
+    HISTORY_FILE,
+    RERUN_HISTORY_FILE,
+    SHARD_SEPARATOR,
+    SHARDS_FILE,
+    detect_flaky,
+    load_reruns,
+    record_outcomes,
+    testcase_outcomes,
+)
+from generate_manifest import catalog_artifact, list_artifacts, write_manifest
+
+
+EMPTY_COUNTS = {"total": 0, "passed": 0, "quadrants": {}, "requirements": {}}
+
+
+def discover(patterns: List[str], directories: bool = False) -> List[Path]:
+    """Expand glob patterns (with ** support) into a sorted, de-duplicated list."""
+    found = set()
+    for pattern in patterns:
+        for match in glob.glob(pattern, recursive=True):
+            path = Path(match)
+            if path.is_dir() if directories else path.is_file():
+                found.add(path)
+    return sorted(found)
+
+
+def shard_roots(junit_paths: List[Path]) -> List[Path]:
+    """Package root of each junit shard, relative to the working directory.
+
+    Trailing directories shared by every shard (e.g. `reports`) are dropped,
+    so `packages/a/reports/junit.xml` belongs to `packages/a`. Shards that
+    all sit in one directory were run from the working directory.
+    """
+    dirs = [Path(os.path.relpath(path.resolve().parent)) for path in junit_paths]
+    if len(set(dirs)) <= 1:
+        return [Path(".") for _ in dirs]
+
+    parts = [d.parts for d in dirs]
+    while all(len(p) > 1 and p[-1] == parts[0][-1] for p in parts):
+        parts = [p[:-1] for p in parts]
+    return [Path(*p) for p in parts]
+
+
+def shard_names(junit_paths: List[Path], roots: List[Path]) -> List[str]:
+    """Namespace for each shard's test ids.
+
+    A shard is named after its package root; when several shards share a
+    root (e.g. `reports/junit-1.xml`, `reports/junit-2.xml`), after its
+    junit path without the suffix. A single shard gets no namespace.
+    """
+    if len(junit_paths) <= 1:
+        return ["" for _ in junit_paths]
+    per_root = Counter(roots)
+    return [
+        root.as_posix() if per_root[root] == 1
+        else Path(os.path.relpath(path.resolve())).with_suffix("").as_posix()
+        for path, root in zip(junit_paths, roots)
+    ]
+
+
+def process_junit(junit_path: Path, shard: str = "") -> Dict:
+    """Map step for one junit shard: parse once, count and collect outcomes."""
+    tree = ET.parse(junit_path)
+    testcases = list(tree.iter("testcase"))
+    prefix = f"{shard}{SHARD_SEPARATOR}" if shard else ""
+    return {
+        "shard": shard,
+        "counts": count_testcases(testcases),
+        "outcomes": [
+            (prefix + test_id, outcome)
+            for test_id, outcome in testcase_outcomes(testcases)
+        ],
+    }
+
+
+def process_shards(
+    junit_patterns: List[str],
+    artifact_patterns: Optional[List[str]] = None,
+    output_dir: str = "reports",
+    workers: Optional[int] = None,
+    merkle: bool = False,
+    archive: bool = False,
+    sign: bool = False
+) -> Dict:
+    """Process all shards in parallel and write the merged reports."""
+    junit_paths = discover(junit_patterns)
+    artifact_dirs = discover(artifact_patterns or [], directories=True)
+    workers = workers or os.cpu_count() or 1
+    output = Path(output_dir)
+    manifest_path = output / "manifest.json"
+
+    artifact_files: List[Path] = []
+    if artifact_dirs:
+        # Paths relative to the common root keep shards from colliding
+        root = Path(os.path.commonpath([d.resolve() for d in artifact_dirs]))
+        if len(artifact_dirs) == 1:
+            root = root.parent
+        for artifacts_dir in artifact_dirs:
+            artifact_files.extend(list_artifacts(artifacts_dir.resolve(), manifest_path.name, archive, merkle))
+
+    roots = shard_roots(junit_paths)
+    names = shard_names(junit_paths, roots)
+
+    print(f"Processing {len(junit_paths)} junit shards and {len(artifact_files)} artifacts with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(junit_paths) // (workers * 4))
+        junit_future = pool.map(process_junit, junit_paths, names, chunksize=chunksize)
+
+        # One task per file, so a single large package cannot stall the pool
+        manifest_future = pool.map(
+            partial(catalog_artifact, artifacts_path=root, archive=archive, merkle=merkle),
+            artifact_files,
+            chunksize=max(1, len(artifact_files) // (workers * 4))
+        ) if artifact_files else []
+
+        # pool.map preserves input order, so the reduce is deterministic
+        shards = list(junit_future)
+        cataloged = [item for items in manifest_future for item in items]
+
+    counts = reduce(merge_counts, (shard["counts"] for shard in shards), EMPTY_COUNTS)
+    quadrants = normalize_counts(counts)
+    by_shard: Dict[str, Dict] = {}
+    for shard in shards:
+        by_shard[shard["shard"]] = merge_counts(by_shard.get(shard["shard"], EMPTY_COUNTS), shard["counts"])
+    if len(by_shard) > 1:
+        quadrants["shards"] = {name: normalize_counts(c) for name, c in by_shard.items()}
+    output.mkdir(parents=True, exist_ok=True)
+    (output / "coverage.json").write_text(json.dumps(quadrants, indent=2))
+    print(f"✓ Quadrants for {quadrants['total']} tests written: {output / 'coverage.json'}")
+
+    history = record_outcomes(
+        (outcome for shard in shards for outcome in shard["outcomes"]),
+        output / HISTORY_FILE.name
+    )
+    flaky = detect_flaky(history, load_reruns(output / RERUN_HISTORY_FILE.name))
+    (output / FLAKY_FILE.name).write_text(json.dumps(flaky, indent=2))
+    print(f"✓ Updated history for {len(history)} tests, {len(flaky)} flaky")
+
+    if any(names):
+        shard_map = {
+            name: {"root": root.as_posix(), "junit": Path(os.path.relpath(path.resolve())).as_posix()}
+            for name, root, path in zip(names, roots, junit_paths)
+        }
+        (output / SHARDS_FILE.name).write_text(json.dumps(shard_map, indent=2))
+
+    manifest = None
+    if artifact_files:
+        manifest = write_manifest(cataloged, str(manifest_path), sign, merkle)
+
+    return {"quadrants": quadrants, "flaky": flaky, "manifest": manifest}
+
+
+def _options(name: str) -> List[str]:
+    """All values given for a repeatable --option."""
+    return [
+        sys.argv[i + 1]
+        for i, arg in enumerate(sys.argv[:-1])
+        if arg == name
+    ]
+
+
+if __name__ == "__main__":
+    junit_patterns = _options("--junit")
+    if not junit_patterns:
+        print("Usage: python process_shards.py --junit <glob> [--junit <glob> ...] [--artifacts <glob>] "
+              "[--output-dir DIR] [--workers N] [--merkle] [--archive] [--sign]")
+        sys.exit(1)
+
+    workers = _options("--workers")
+    output_dir = _options("--output-dir")
+
+    process_shards(
+        junit_patterns,
+        _options("--artifacts"),
+        output_dir=output_dir[0] if output_dir else "reports",
+        workers=int(workers[0]) if workers else None,
+        merkle="--merkle" in sys.argv,
+        archive="--archive" in sys.argv,
+        sign="--sign" in sys.argv
+    )
@@ -0,0 +1,305 @@
+"""Rerun flaky and failing tests in isolation to settle their verdict.
+
+Takes the tests flagged in reports/flaky_tests.json plus the failures of the
+current junit.xml and reruns only those test ids, each attempt in its own
+pytest subprocess, across a pool of workers. A test stops being rerun as soon
+as its verdict is settled:
+
+- flaky: both passing and failing outcomes were observed
+- pass / fail: N consistent outcomes in a row, where N is the smallest run
+  count for which a test failing (or passing) at FLAKE_RATE would have
+  produced a different outcome with probability >= 1 - ALPHA
+
+Tests that cannot be rerun (pytest usage/internal errors, nothing
+collected) get an "unrunnable" verdict instead of counting as failures.
+Shard-namespaced ids from process_shards.py (`packages/a::tests.x.test_y`)
+are rerun from their package root, looked up in reports/shards.json.
+
+Each settled verdict is stored in reports/rerun_history.json together with
+the outcome history it was judged against, rather than as extra entries in
+test_history.json, so a batch cannot push older runs out of the window.
+detect_flaky.py reads it back: a stable verdict clears the flag until new
+runs flip again, a flaky verdict keeps it. The flaky report is refreshed,
+the verdicts are written to reports/rerun_results.json and merged into
+.mirror/report/decisions.json when present.
+"""
+import json
+import math
+import os
+import subprocess
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from detect_flaky import (
+    FLAKY_FILE,
+    RERUN_HISTORY_FILE,
+    SHARDS_FILE,
+    detect_flaky,
+    flip_rate,
+    load_history,
+    load_reruns,
+    load_shards,
+    parse_junit,
+    split_shard,
+)
+
+
+RERUN_FILE = Path("reports/rerun_results.json")
+DECISIONS_FILE = Path(".mirror/report/decisions.json")
+MAX_RUNS = 10
+ALPHA = 0.05  # Accepted chance of missing a flaky test
+FLAKE_RATE = 0.3  # Smallest flip rate we care to detect
+TIMEOUT = 600  # Seconds per rerun attempt
+
+
+def runs_to_settle(alpha: float = ALPHA, flake_rate: float = FLAKE_RATE) -> int:
+    """Consistent outcomes needed before a test is considered stable."""
+    return math.ceil(math.log(alpha) / math.log(1 - flake_rate))
+
+
+def node_id(test_id: str, root: Path = Path(".")) -> str:
+    """Map a junit `classname.name` id back to a pytest node id."""
+    # The name may carry parameters with dots (`test_p[1.5]`); keep it whole
+    bracket = test_id.find("[")
+    split = test_id.rfind(".", 0, bracket if bracket != -1 else len(test_id))
+    if split == -1:
+        return test_id
+    classname, name = test_id[:split], test_id[split + 1:]
+
+    parts = classname.split(".")
+    # Longest dotted prefix that is a module file, remainder is the class path
+    for i in range(len(parts), 0, -1):
+        module = Path(*parts[:i]).with_suffix(".py")
+        if (root / module).exists():
+            return "::".join([module.as_posix(), *parts[i:], name])
+    return test_id
+
+
+def resolve(test_id: str, shards: Optional[Dict[str, Dict]] = None) -> Tuple[str, Path]:
+    """Pytest node id for a (possibly shard-namespaced) id, and where to run it."""
+    shard, plain_id = split_shard(test_id)
+    if shard and shard in (shards or {}):
+        root = Path(shards[shard]["root"])
+        return node_id(plain_id, root), root
+    return node_id(test_id), Path(".")
+
+
+def run_once(
+    test_id: str,
+    timeout: int = TIMEOUT,
+    shards: Optional[Dict[str, Dict]] = None
+) -> Optional[str]:
+    """Run a single test in a fresh pytest process and return its outcome.
+
+    Returns None when pytest could not run the test at all.
+    """
+    node, cwd = resolve(test_id, shards)
+    cmd = [
+        sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", node,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=timeout, cwd=cwd)
+    except subprocess.TimeoutExpired:
+        return "error"
+    if result.returncode == 0:
+        return "pass"
+    if result.returncode == 1:
+        return "fail"
+    # Interrupted, internal error, usage error or nothing collected
+    return None
+
+
+def verdict(outcomes: List[str], settle: int) -> Optional[str]:
+    """Return the settled verdict for observed outcomes, or None."""
+    observed = {"fail" if o == "error" else o for o in outcomes if o != "skip"}
+    if len(observed) > 1:
+        return "flaky"
+    if len(outcomes) >= settle and observed:
+        return observed.pop()
+    return None
+
+
+def rerun(
+    test_ids: List[str],
+    seeds: Optional[Dict[str, List[str]]] = None,
+    max_runs: int = MAX_RUNS,
+    workers: Optional[int] = None,
+    shards: Optional[Dict[str, Dict]] = None
+) -> Dict[str, Dict]:
+    """Rerun tests in parallel until each verdict settles or max_runs is hit.
+
+    seeds holds outcomes already observed (e.g. the failure from the current
+    run); they count towards the verdict but are not rerun. A test never has
+    more attempts in flight than it still needs to settle, and its queued
+    attempts are cancelled as soon as its verdict is known.
+    """
+    settle = min(runs_to_settle(), max_runs)
+    seeds = seeds or {}
+    observed = {test_id: list(seeds.get(test_id, [])) for test_id in test_ids}
+    reruns: Dict[str, List[str]] = {test_id: [] for test_id in test_ids}
+    verdicts: Dict[str, Optional[str]] = {
+        test_id: verdict(observed[test_id], settle) for test_id in test_ids
+    }
+    in_flight: Dict[str, int] = {test_id: 0 for test_id in test_ids}
+
+    def wanted(test_id: str) -> bool:
+        # No speculative attempts beyond the ones that could still matter
+        return (
+            verdicts[test_id] is None
+            and len(observed[test_id]) + in_flight[test_id] < settle
+        )
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+
+        def fill():
+            # Round-robin so every test makes progress
+            while len(futures) < workers:
+                candidates = [t for t in test_ids if wanted(t)]
+                if not candidates:
+                    return
+                test_id = min(candidates, key=lambda t: len(reruns[t]) + in_flight[t])
+                in_flight[test_id] += 1
+                futures[pool.submit(run_once, test_id, shards=shards)] = test_id
+
+        fill()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in futures:
+                    continue  # Cancelled while waiting
+                test_id = futures.pop(future)
+                in_flight[test_id] -= 1
+                outcome = future.result()
+                if outcome is None:
+                    verdicts[test_id] = verdicts[test_id] or "unrunnable"
+                else:
+                    reruns[test_id].append(outcome)
+                    observed[test_id].append(outcome)
+                    if verdicts[test_id] is None:
+                        verdicts[test_id] = verdict(observed[test_id], settle)
+                if verdicts[test_id] is not None:
+                    for pending, pending_id in list(futures.items()):
+                        if pending_id == test_id and pending.cancel():
+                            del futures[pending]
+                            in_flight[test_id] -= 1
+            fill()
+
+    return {
+        test_id: {
+            "verdict": verdicts[test_id] or "inconclusive",
+            "reruns": reruns[test_id],
+            "failures": sum(o in ("fail", "error") for o in observed[test_id]),
+            "runs": len(observed[test_id]),
+            "flakiness": round(flip_rate(observed[test_id]), 3),
+        }
+        for test_id in test_ids
+    }
+
+
+def merge_history(results: Dict[str, Dict]) -> Dict[str, float]:
+    """Store settled verdicts for detect_flaky and refresh the flaky report."""
+    history = load_history()
+    reruns = load_reruns()
+    for test_id, result in results.items():
+        if result["verdict"] not in ("flaky", "pass", "fail"):
+            continue  # Nothing learned; keep the previous batch
+        reruns[test_id] = {
+            **{k: result[k] for k in ("verdict", "failures", "runs", "flakiness")},
+            # Lets detect_flaky tell which runs came after this batch
+            "history": list(history.get(test_id, [])),
+        }
+    RERUN_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    RERUN_HISTORY_FILE.write_text(json.dumps(reruns, indent=2))
+
+    flaky = detect_flaky(history, reruns)
+    FLAKY_FILE.write_text(json.dumps(flaky, indent=2))
+    return flaky
+
+
+def merge_decisions(results: Dict[str, Dict], decisions_path: Path = DECISIONS_FILE) -> int:
+    """Annotate matching decisions with their rerun verdict.
+
+    Decisions name plain test ids; a shard-namespaced result matches when
+    no other shard reran a test with the same id.
+    """
+    if not decisions_path.exists():
+        return 0
+    decisions = json.loads(decisions_path.read_text())
+    by_plain_id: Dict[str, List[Dict]] = {}
+    for test_id, result in results.items():
+        by_plain_id.setdefault(split_shard(test_id)[1], []).append(result)
+    updated = 0
+    for decision in decisions:
+        oracle = decision.get("oracle")
+        matches = by_plain_id.get(oracle, [])
+        result = results.get(oracle) or (matches[0] if len(matches) == 1 else None)
+        if result is None:
+            continue
+        decision["rerun"] = {k: result[k] for k in ("verdict", "failures", "runs")}
+        note = rerun_message(result)
+        message = decision.get("message")
+        decision["message"] = f"{message} | {note}" if message else note
+        updated += 1
+    decisions_path.write_text(json.dumps(decisions, indent=2))
+    return updated
+
+
+def rerun_message(result: Dict) -> str:
+    """Human-readable summary of a rerun verdict."""
+    summary = f"{result['failures']}/{result['runs']} runs failed"
+    if result["verdict"] == "flaky":
+        return f"⚠ Flaky confirmed by rerun ({summary})"
+    if result["verdict"] == "fail":
+        return f"✗ Consistent failure on rerun ({summary})"
+    if result["verdict"] == "pass":
+        return f"✓ Stable on rerun ({summary})"
+    if result["verdict"] == "unrunnable":
+        return f"? Could not rerun ({summary})"
+    return f"? Rerun inconclusive ({summary})"
+
+
+def main(junit_path: str, max_runs: int = MAX_RUNS, workers: Optional[int] = None):
+    """Main entry point."""
+    flaky = json.loads(FLAKY_FILE.read_text()) if FLAKY_FILE.exists() else {}
+    failures = {
+        test_id: [outcome]
+        for test_id, outcome in parse_junit(junit_path)
+        if outcome in ("fail", "error")
+    }
+    test_ids = sorted(set(flaky) | set(failures))
+
+    if not test_ids:
+        print("✓ No flaky or failing tests to rerun")
+        return
+
+    print(f"Rerunning {len(test_ids)} tests (up to {max_runs}x each)...")
+    shards = load_shards(FLAKY_FILE.with_name(SHARDS_FILE.name))
+    results = rerun(test_ids, seeds=failures, max_runs=max_runs, workers=workers, shards=shards)
+
+    RERUN_FILE.parent.mkdir(parents=True, exist_ok=True)
+    RERUN_FILE.write_text(json.dumps(results, indent=2))
+    merge_history(results)
+    updated = merge_decisions(results)
+
+    for test_id, result in results.items():
+        print(f"  - {test_id}: {rerun_message(result)}")
+    print(f"✓ Rerun results written: {RERUN_FILE}")
+    if updated:
+        print(f"  {updated} decisions annotated")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python rerun_flaky.py <junit.xml> [--runs N] [--workers N]")
+        sys.exit(1)
+
+    def option(name: str) -> Optional[int]:
+        if name in sys.argv and sys.argv.index(name) + 1 < len(sys.argv):
+            return int(sys.argv[sys.argv.index(name) + 1])
+        return None
+
+    main(sys.argv[1], max_runs=option("--runs") or MAX_RUNS, workers=option("--workers"))
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Requirement traceability index across tests, runs and evidence.
+
+Joins the sources that link tests to requirements:
+- @pytest.mark.requirement / interface / module markers (static AST scan)
+- the TEST_TO_REQUIREMENT map in scripts/update_test_markers.py (optional)
+- requirement_id properties in junit.xml (written by tests/conftest.py)
+- the requirements registry in tests/fixtures/requirements.json
+- outcome history (reports/test_history.json) and decisions evidence
+
+The index is cached in reports/trace_index.json. Rebuilding only re-parses
+test files whose mtime or size changed; queries are dictionary lookups.
+
+Usage:
+    python scripts/trace_requirements.py build
+    python scripts/trace_requirements.py tests S02P01-INV-001
+    python scripts/trace_requirements.py untested [--risk critical]
+    python scripts/trace_requirements.py evidence S02P01-INV-001
+"""
+import ast
+import json
+import sys
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from detect_flaky import HISTORY_FILE, testcase_outcome
+
+try:
+    from update_test_markers import TEST_TO_REQUIREMENT
+except ImportError:  # One-time migration helper, may have been deleted
+    TEST_TO_REQUIREMENT = {}
+
+
+TESTS_DIR = Path("tests")
+REGISTRY_FILE = Path("tests/fixtures/requirements.json")
+JUNIT_FILE = Path("reports/junit.xml")
+DECISIONS_FILE = Path(".mirror/report/decisions.json")
+INDEX_FILE = Path("reports/trace_index.json")
+INDEX_SCHEMA = "mirror.trace-index.v1"
+LINK_MARKERS = ("requirement", "interface", "module")
+OUTCOME_RANK = {"skip": 0, "pass": 1, "fail": 2, "error": 3}
+
+
+def split_params(test_id: str) -> Tuple[str, Optional[str]]:
+    """Split `mod.test_p[1.5]` into (`mod.test_p`, `1.5`)."""
+    bracket = test_id.find("[")
+    if bracket == -1 or not test_id.endswith("]"):
+        return test_id, None
+    return test_id[:bracket], test_id[bracket + 1:-1]
+
+
+def _mark_name(node: ast.expr) -> Optional[str]:
+    """Return `x` for a `pytest.mark.x` or `pytest.mark.x(...)` decorator."""
+    if isinstance(node, ast.Call):
+        node = node.func
+    if (
+        isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Attribute)
+        and node.value.attr == "mark"
+    ):
+        return node.attr
+    return None
+
+
+def _mark_values(decorators: List[ast.expr]) -> Dict[str, List[str]]:
+    """Collect string arguments of link markers from a decorator list."""
+    values = defaultdict(list)
+    for node in decorators:
+        name = _mark_name(node)
+        if name not in LINK_MARKERS:
+            continue
+        if isinstance(node, ast.Call):
+            for arg in node.args:
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    values[name].append(arg.value)
+        else:
+            # Bare marker, e.g. @pytest.mark.interface
+            values.setdefault(name, [])
+    return values
+
+
+def _module_marks(tree: ast.Module) -> List[ast.expr]:
+    """Decorator-equivalent nodes from a module-level `pytestmark`."""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "pytestmark" for t in node.targets
+        ):
+            value = node.value
+            return list(value.elts) if isinstance(value, (ast.List, ast.Tuple)) else [value]
+    return []
+
+
+def scan_file(path: Path, root: Path = Path(".")) -> List[Dict]:
+    """Statically extract tests and their requirement links from one file."""
+    tree = ast.parse(path.read_text(), filename=str(path))
+    classname = ".".join(path.relative_to(root).with_suffix("").parts)
+    module_marks = _module_marks(tree)
+    tests = []
+
+    def add(func: ast.FunctionDef, prefix: str, inherited: List[ast.expr]):
+        marks = _mark_values(inherited + func.decorator_list)
+        requirements = list(dict.fromkeys(marks.get("requirement", [])))
+        mapped = TEST_TO_REQUIREMENT.get(func.name)
+        tests.append({
+            "test_id": f"{prefix}.{func.name}",
+            "file": path.relative_to(root).as_posix(),
+            "line": func.lineno,
+            "requirements": requirements,
+            "suggested": [mapped] if mapped and mapped not in requirements else [],
+            "interface": marks.get("interface", []),
+            "module": marks.get("module", []),
+        })
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            add(node, classname, module_marks)
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test"):
+                    add(item, f"{classname}.{node.name}", module_marks + node.decorator_list)
+    return tests
+
+
+def scan_tests(
+    tests_dir: Path = TESTS_DIR,
+    cache: Optional[Dict[str, Dict]] = None,
+    root: Path = Path(".")
+) -> Dict[str, Dict]:
+    """Scan test files, reusing cached results for unchanged files."""
+    cache = cache or {}
+    files = {}
+    reparsed = 0
+    for path in sorted(tests_dir.rglob("test_*.py")):
+        key = path.relative_to(root).as_posix()
+        stat = path.stat()
+        cached = cache.get(key)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            files[key] = cached
+            continue
+        try:
+            tests = scan_file(path, root)
+        except SyntaxError as e:
+            print(f"⚠ Skipping {key}: {e}")
+            tests = []
+        files[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "tests": tests}
+        reparsed += 1
+    if reparsed:
+        print(f"  Re-scanned {reparsed}/{len(files)} test files")
+    return files
+
+
+def load_junit_links(junit_path: Path = JUNIT_FILE) -> Dict[str, Dict]:
+    """Requirement properties and outcomes recorded in the latest junit.xml."""
+    if not junit_path.exists():
+        return {}
+    links = {}
+    for _, elem in ET.iterparse(junit_path):
+        if elem.tag != "testcase":
+            continue
+        test_id = f"{elem.attrib.get('classname', '')}.{elem.attrib.get('name', '')}"
+        links[test_id] = {
+            "outcome": testcase_outcome(elem),
+            "requirements": [
+                prop.attrib.get("value")
+                for prop in elem.findall(".//properties/property")
+                if prop.attrib.get("name") == "requirement_id"
+            ],
+        }
+        elem.clear()
+    return links
+
+
+def _load_json(path: Path, default):
+    return json.loads(path.read_text()) if path.exists() else default
+
+
+def build_index(
+    tests_dir: Path = TESTS_DIR,
+    index_path: Path = INDEX_FILE,
+    junit_path: Path = JUNIT_FILE,
+    decisions_path: Path = DECISIONS_FILE
+) -> Dict:
+    """(Re)build the traceability index and write it to index_path."""
+    previous = _load_json(index_path, {})
+    cache = previous.get("files", {}) if previous.get("schema") == INDEX_SCHEMA else {}
+    files = scan_tests(tests_dir, cache)
+
+    registry = _load_json(REGISTRY_FILE, {})
+    history = _load_json(HISTORY_FILE, {})
+    junit = load_junit_links(junit_path)
+
+    tests = {}
+    for entry in files.values():
+        for test in entry["tests"]:
+            tests[test["test_id"]] = dict(test)
+
+    # Parametrized junit ids (`test_p[1.5]`) join onto the static test id
+    for junit_id, link in junit.items():
+        test_id, param = split_params(junit_id)
+        test = tests.setdefault(test_id, {"test_id": test_id, "requirements": []})
+        previous = test.get("last_outcome")
+        if previous is None or OUTCOME_RANK.get(link["outcome"], 0) > OUTCOME_RANK.get(previous, 0):
+            # Worst outcome across parameters
+            test["last_outcome"] = link["outcome"]
+        if param is not None and param not in test.setdefault("params", []):
+            test["params"].append(param)
+        for req_id in link["requirements"]:
+            if req_id not in test["requirements"]:
+                test["requirements"] = [*test["requirements"], req_id]
+
+    for history_id, outcomes in history.items():
+        test_id, param = split_params(history_id)
+        if test_id not in tests:
+            continue
+        if param is None:
+            tests[test_id]["history"] = outcomes
+        else:
+            tests[test_id].setdefault("param_history", {})[param] = outcomes
+
+    evidence = defaultdict(list)
+    for decision in _load_json(decisions_path, []):
+        for req_id in decision.get("satisfies", []):
+            evidence[req_id].append({
+                "oracle": decision.get("oracle"),
+                "result": decision.get("result"),
+                "evidence": decision.get("evidence", []),
+            })
+    if junit:
+        for test_id, link in junit.items():
+            for req_id in link["requirements"]:
+                evidence[req_id].append({
+                    "oracle": test_id,
+                    "result": link["outcome"],
+                    "evidence": [junit_path.as_posix()],
+                })
+
+    index = {
+        "schema": INDEX_SCHEMA,
+        "files": files,
+        "tests": tests,
+        "registry": registry,
+        "evidence": dict(evidence),
+    }
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    index_path.write_text(json.dumps(index, indent=2))
+    return index
+
+
+class TraceIndex:
+    """Query API over a built index; all lookups are O(1) dict accesses."""
+
+    def __init__(self, index: Dict):
+        self.tests = index["tests"]
+        self.registry = index.get("registry", {})
+        self.evidence = index.get("evidence", {})
+        self.by_requirement: Dict[str, Set[str]] = defaultdict(set)
+        self.suggested: Dict[str, Set[str]] = defaultdict(set)
+        for test_id, test in self.tests.items():
+            for req_id in test.get("requirements", []):
+                self.by_requirement[req_id].add(test_id)
+            for req_id in test.get("suggested", []):
+                self.suggested[req_id].add(test_id)
+
+    @classmethod
+    def load(cls, index_path: Path = INDEX_FILE) -> "TraceIndex":
+        return cls(json.loads(index_path.read_text()))
+
+    def tests_for(self, req_id: str, include_suggested: bool = False) -> List[str]:
+        """Tests that prove a requirement."""
+        tests = set(self.by_requirement.get(req_id, ()))
+        if include_suggested:
+            tests |= self.suggested.get(req_id, set())
+        return sorted(tests)
+
+    def requirements_for(self, test_id: str) -> List[str]:
+        """Requirements linked to a test."""
+        return self.tests.get(test_id, {}).get("requirements", [])
+
+    def untested(self, risk: Optional[str] = None) -> List[str]:
+        """Registered requirements without any linked test."""
+        return sorted(
+            req_id for req_id, req in self.registry.items()
+            if not self.by_requirement.get(req_id)
+            and (risk is None or req.get("risk") == risk)
+        )
+
+    def unregistered(self) -> List[str]:
+        """Requirements referenced by tests but missing from the registry."""
+        return sorted(set(self.by_requirement) - set(self.registry))
+
+    def evidence_for(self, req_id: str) -> List[Dict]:
+        """Decisions and artifacts backing a requirement."""
+        return self.evidence.get(req_id, [])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("build", "tests", "untested", "evidence"):
+        print("Usage: python trace_requirements.py build|tests <REQ>|untested [--risk R]|evidence <REQ>")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "build" or not INDEX_FILE.exists():
+        index = TraceIndex(build_index())
+        if command == "build":
+            print(f"✓ Trace index written: {INDEX_FILE}")
+            print(f"  {len(index.tests)} tests, {len(index.by_requirement)} linked requirements")
+            sys.exit(0)
+    else:
+        index = TraceIndex.load()
+
+    if command == "untested":
+        risk = sys.argv[sys.argv.index("--risk") + 1] if "--risk" in sys.argv else None
+        result = index.untested(risk)
+    elif len(sys.argv) < 3:
+        print(f"Usage: python trace_requirements.py {command} <REQ>")
+        sys.exit(1)
+    elif command == "tests":
+        result = index.tests_for(sys.argv[2], include_suggested="--suggested" in sys.argv)
+    else:
+        result = index.evidence_for(sys.argv[2])
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Watch a growing report directory and keep coverage quadrants up to date.
+
+Long hardware-in-the-loop suites write results incrementally. Instead of
+waiting for the final junit.xml, this script tails event JSONL files and
+junit shard files in .mirror/report, updates running counters in O(1) per
+new result and periodically writes a snapshot in the same shape as
+compute_quadrants.py (plus live flaky flags).
+
+Each file is read only from its last offset, so results are never
+re-parsed. Junit shards are fed to an incremental XML parser and every
+<testcase> is dropped from the tree once counted, keeping memory bounded.
+
+Event JSONL lines are JSON objects such as:
+    {"test_id": "tests.test_smoke.test_addition", "outcome": "pass",
+     "markers": ["temporal"], "requirement_id": "S02P02-TIME-003"}
+
+Usage:
+    python scripts/watch_quadrants.py [report_dir] [--output PATH]
+        [--interval SECONDS] [--poll SECONDS] [--idle-exit SECONDS] [--once]
+"""
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from compute_quadrants import extract_markers, infer_markers, normalize_counts
+from detect_flaky import WINDOW_SIZE, load_history, testcase_outcome
+
+
+REPORT_DIR = Path(".mirror/report")
+SNAPSHOT_FILE = "coverage.live.json"
+EVENT_PATTERNS = ("*.jsonl",)
+JUNIT_PATTERNS = ("*.xml",)
+READ_CHUNK = 1 << 20  # Max bytes consumed per file per poll
+HEAD_SIZE = 256  # Leading bytes compared to spot a rewritten file
+FLAKY_MIN_RUNS = 4
+FLAKY_THRESHOLD = 0.2
+
+
+class OutcomeWindow:
+    """Bounded outcome history with an incrementally maintained flip count."""
+
+    __slots__ = ("outcomes", "transitions")
+
+    def __init__(self, outcomes: Iterable[str] = ()):
+        self.outcomes = deque(maxlen=WINDOW_SIZE)
+        self.transitions = 0
+        for outcome in outcomes:
+            self.append(outcome)
+
+    def append(self, outcome: str) -> None:
+        window = self.outcomes
+        if len(window) == window.maxlen and len(window) > 1:
+            # The oldest pair falls out of the window
+            if window[0] != window[1]:
+                self.transitions -= 1
+        if window and window[-1] != outcome:
+            self.transitions += 1
+        window.append(outcome)
+
+    @property
+    def flakiness(self) -> float:
+        if len(self.outcomes) < 2:
+            return 0.0
+        return self.transitions / (len(self.outcomes) - 1)
+
+
+class LiveQuadrants:
+    """Running counters for quadrants, requirements and flaky flags."""
+
+    def __init__(self, history: Optional[Dict[str, List[str]]] = None):
+        self.total = 0
+        self.passed = 0
+        self.quadrants = Counter()
+        self.by_requirement = defaultdict(lambda: {"pass": 0, "fail": 0})
+        self.windows: Dict[str, OutcomeWindow] = {
+            test_id: OutcomeWindow(outcomes)
+            for test_id, outcomes in (history or {}).items()
+        }
+        self.flaky: Dict[str, float] = {}
+        for test_id in self.windows:
+            self._update_flaky(test_id)
+
+    def add(
+        self,
+        test_id: str,
+        outcome: str,
+        marks: Iterable[str] = (),
+        requirement_ids: Iterable[str] = ()
+    ) -> None:
+        """Account for a single test result."""
+        self.total += 1
+        failed = outcome in ("fail", "error")
+        if not failed:
+            self.passed += 1
+
+        marks = set(marks)
+        for quadrant in ("interface", "temporal", "risk"):
+            if quadrant in marks:
+                self.quadrants[quadrant] += 1
+
+        status = "fail" if failed else "pass"
+        for req_id in requirement_ids:
+            self.by_requirement[req_id][status] += 1
+            self.quadrants["requirement"] += 1
+
+        window = self.windows.get(test_id)
+        if window is None:
+            window = self.windows[test_id] = OutcomeWindow()
+        window.append(outcome)
+        self._update_flaky(test_id)
+
+    def _update_flaky(self, test_id: str) -> None:
+        window = self.windows[test_id]
+        if len(window.outcomes) >= FLAKY_MIN_RUNS and window.flakiness > FLAKY_THRESHOLD:
+            self.flaky[test_id] = round(window.flakiness, 3)
+        else:
+            self.flaky.pop(test_id, None)
+
+    def snapshot(self) -> Dict:
+        """Return the current state in compute_quadrants.py format."""
+        snapshot = normalize_counts({
+            "total": self.total,
+            "passed": self.passed,
+            "quadrants": self.quadrants,
+            "requirements": self.by_requirement,
+        })
+        snapshot["flaky"] = dict(self.flaky)
+        return snapshot
+
+
+class JunitTail:
+    """Incrementally parse a junit shard that is still being written.
+
+    A file that is replaced (new inode), truncated, rewritten in place
+    (different leading bytes) or grows after its root element closed (e.g.
+    pytest rerun overwriting junit.xml) is parsed again from the start.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.identity = None
+        self.head = b""
+        self._reset()
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self.ignored = False
+        self.closed = False
+        self.head = b""
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.stack: List[ET.Element] = []
+
+    def _replaced(self, stat: os.stat_result) -> bool:
+        if (stat.st_dev, stat.st_ino) != self.identity or stat.st_size < self.offset:
+            return True
+        if self.closed and stat.st_size > self.offset:
+            return True
+        if self.head:
+            with self.path.open("rb") as f:
+                return f.read(len(self.head)) != self.head
+        return False
+
+    def poll(self, live: LiveQuadrants) -> int:
+        """Consume newly appended bytes; return the number of results counted."""
+        stat = self.path.stat()
+        if self.identity is not None and self._replaced(stat):
+            # Start over as a new shard
+            self._reset()
+        self.identity = (stat.st_dev, stat.st_ino)
+        if self.ignored:
+            return 0
+        size = stat.st_size
+        if size == self.offset:
+            return 0
+
+        with self.path.open("rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, READ_CHUNK))
+        if self.offset < HEAD_SIZE:
+            self.head = (self.head + data)[:HEAD_SIZE]
+        self.offset += len(data)
+
+        try:
+            self.parser.feed(data)
+            events = list(self.parser.read_events())
+        except ET.ParseError as e:
+            print(f"⚠ Stopped tailing {self.path}: {e}")
+            self.ignored = True
+            return 0
+
+        counted = 0
+        for event, elem in events:
+            if event == "start":
+                if not self.stack and elem.tag not in ("testsuites", "testsuite"):
+                    # Not a junit file (e.g. coverage.xml)
+                    self.ignored = True
+                    return counted
+                self.stack.append(elem)
+                continue
+
+            self.stack.pop()
+            if not self.stack:
+                # Root closed: any further growth is a new document
+                self.closed = True
+            if elem.tag != "testcase":
+                continue
+
+            classname = elem.attrib.get("classname", "")
+            name = elem.attrib.get("name", "")
+            requirement_ids = [
+                prop.attrib.get("value")
+                for prop in elem.findall(".//properties/property")
+                if prop.attrib.get("name") == "requirement_id"
+            ]
+            live.add(
+                f"{classname}.{name}",
+                testcase_outcome(elem),
+                extract_markers(elem),
+                requirement_ids
+            )
+            counted += 1
+
+            # Drop the counted element so the tree never grows
+            if self.stack:
+                self.stack[-1].remove(elem)
+        return counted
+
+
+class EventTail:
+    """Follow an append-only JSONL event file line by line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self.partial = b""
+
+    def poll(self, live: LiveQuadrants) -> int:
+        """Consume newly appended lines; return the number of results counted."""
+        size = self.path.stat().st_size
+        if size < self.offset:
+            self.offset = 0
+            self.partial = b""
+        if size == self.offset:
+            return 0
+
+        with self.path.open("rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, READ_CHUNK))
+        self.offset += len(data)
+
+        lines = (self.partial + data).split(b"\n")
+        # Keep an incomplete trailing line until the writer finishes it
+        self.partial = lines.pop()
+
+        counted = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict):
+                continue
+
+            outcome = event.get("outcome") or event.get("result")
+            if outcome is None:
+                continue
+            test_id = event.get("test_id") or event.get("oracle") or (
+                f"{event.get('classname', '')}.{event.get('name', '')}"
+            )
+            marks = set(event.get("markers") or ())
+            marks.update(infer_markers(event.get("classname", test_id), event.get("name", "")))
+            requirement_ids = event.get("satisfies") or []
+            if event.get("requirement_id"):
+                requirement_ids = [event["requirement_id"], *requirement_ids]
+
+            live.add(test_id, outcome, marks, requirement_ids)
+            counted += 1
+        return counted
+
+
+def discover(report_dir: Path, tails: Dict[Path, object]) -> None:
+    """Register tails for shard files that appeared since the last poll."""
+    for patterns, tail_cls in ((EVENT_PATTERNS, EventTail), (JUNIT_PATTERNS, JunitTail)):
+        for pattern in patterns:
+            for path in report_dir.glob(pattern):
+                if path not in tails and path.is_file():
+                    tails[path] = tail_cls(path)
+
+
+def write_snapshot(live: LiveQuadrants, output: Path) -> None:
+    """Atomically replace the snapshot file."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    tmp.write_text(json.dumps(live.snapshot(), indent=2))
+    os.replace(tmp, output)
+
+
+def watch(
+    report_dir: Path = REPORT_DIR,
+    output: Optional[Path] = None,
+    interval: float = 30.0,
+    poll: float = 1.0,
+    idle_exit: Optional[float] = None,
+    once: bool = False
+) -> LiveQuadrants:
+    """Tail report_dir until interrupted, writing snapshots every interval."""
+    output = output or report_dir / SNAPSHOT_FILE
+    live = LiveQuadrants(load_history())
+    tails: Dict[Path, object] = {}
+    last_snapshot = 0.0
+    last_activity = time.monotonic()
+
+    print(f"Watching {report_dir} (snapshot every {interval:g}s → {output})")
+    try:
+        while True:
+            discover(report_dir, tails)
+            counted = 0
+            for path, tail in list(tails.items()):
+                try:
+                    counted += tail.poll(live)
+                except FileNotFoundError:
+                    del tails[path]
+
+            now = time.monotonic()
+            if counted:
+                last_activity = now
+            # Drain remaining backlog before sleeping
+            backlog = any(
+                path.exists() and tail.offset < path.stat().st_size
+                and not getattr(tail, "ignored", False)
+                for path, tail in tails.items()
+            )
+
+            if once and not backlog:
+                break
+            if now - last_snapshot >= interval:
+                write_snapshot(live, output)
+                last_snapshot = now
+            if idle_exit is not None and now - last_activity >= idle_exit:
+                print(f"No new results for {idle_exit:g}s, stopping")
+                break
+            if not backlog:
+                time.sleep(poll)
+    except KeyboardInterrupt:
+        pass
+
+    write_snapshot(live, output)
+    print(f"✓ Snapshot written: {output}")
+    print(f"  {live.total} results, {live.passed} passed, {len(live.flaky)} flaky")
+    return live
+
+
+def _option(name: str, default: Optional[str] = None) -> Optional[str]:
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+
+if __name__ == "__main__":
+    report_dir = Path(sys.argv[1]) if len(sys.argv) > 1 and not sys.argv[1].startswith("--") else REPORT_DIR
+    output = _option("--output")
+    idle_exit = _option("--idle-exit")
+
+    watch(
+        report_dir,
+        Path(output) if output else None,
+        interval=float(_option("--interval", "30")),
+        poll=float(_option("--poll", "1")),
+        idle_exit=float(idle_exit) if idle_exit else None,
+        once="--once" in sys.argv
+    )
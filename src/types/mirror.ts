@@ -6,6 +6,21 @@ export type Coverage = {
   interface: number;
   risk: number;
   by_requirement?: { id: string; result: "pass" | "fail" | "unknown" }[];
+  code?: CodeCoverage;
+};
+
+export type CodeCoverageRow = {
+  id: string;
+  files: number;
+  lines_covered: number;
+  lines_total: number;
+  rate: number;
+};
+
+export type CodeCoverage = {
+  line_rate: number;
+  by_requirement: CodeCoverageRow[];
+  by_interface: CodeCoverageRow[];
 };
 
 export type Decision = {
@@ -24,7 +24,12 @@ type Coverage = {
   temporal: number; 
   interface: number; 
   risk: number; 
-  by_requirement?: {id: string; result: "pass" | "fail" | "unknown" | "skip"}[] 
+  by_requirement?: {id: string; result: "pass" | "fail" | "unknown" | "skip"}[];
+  code?: {
+    line_rate: number;
+    by_requirement: {id: string; files: number; lines_covered: number; lines_total: number; rate: number}[];
+    by_interface: {id: string; files: number; lines_covered: number; lines_total: number; rate: number}[];
+  };
 };
 
 type Decision = { 
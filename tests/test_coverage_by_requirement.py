@@ -0,0 +1,110 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from coverage_by_requirement import accumulate_context_lines, attribute_coverage, parse_cobertura  # noqa: E402
+from trace_requirements import TraceIndex  # noqa: E402
+
+
+COBERTURA = """<?xml version="1.0" ?>
+<coverage line-rate="0.5">
+  <sources><source>/repo</source></sources>
+  <packages><package name="pkg"><classes>
+    <class filename="pkg/core.py" name="core.py">
+      <methods><method name="run">
+        <lines><line number="3" hits="1"/><line number="4" hits="1"/></lines>
+      </method></methods>
+      <lines>
+        <line number="1" hits="1"/><line number="3" hits="1"/>
+        <line number="4" hits="1"/><line number="6" hits="0"/>
+      </lines>
+    </class>
+    <class filename="pkg/util.py" name="util.py">
+      <lines><line number="1" hits="1"/><line number="2" hits="0"/></lines>
+      <methods><method name="helper">
+        <lines><line number="2" hits="0"/></lines>
+      </method></methods>
+    </class>
+    <class filename="tests/test_core.py" name="test_core.py">
+      <lines><line number="1" hits="1"/><line number="2" hits="1"/></lines>
+    </class>
+    <class filename="tests/conftest.py" name="conftest.py">
+      <lines><line number="1" hits="1"/></lines>
+    </class>
+  </classes></package></packages>
+</coverage>
+"""
+
+INDEX = TraceIndex({"tests": {
+    "tests.test_core.test_run": {
+        "file": "tests/test_core.py", "requirements": ["REQ-1"], "interface": ["Inventory"],
+    },
+    "tests.test_core.test_util": {
+        "file": "tests/test_core.py", "requirements": ["REQ-1", "REQ-2"], "interface": [],
+    },
+}})
+
+
+def bits(*lines):
+    return sum(1 << n for n in lines)
+
+
+def numbits(*lines):
+    return bits(*lines).to_bytes((max(lines) // 8) + 1, "little")
+
+
+def write_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE file (id INTEGER PRIMARY KEY, path TEXT);
+        CREATE TABLE context (id INTEGER PRIMARY KEY, context TEXT);
+        CREATE TABLE line_bits (file_id INTEGER, context_id INTEGER, numbits BLOB);
+    """)
+    conn.executemany("INSERT INTO file VALUES (?, ?)", [
+        (1, "/repo/pkg/core.py"), (2, "/repo/pkg/util.py"), (3, "/repo/tests/test_core.py"),
+    ])
+    conn.executemany("INSERT INTO context VALUES (?, ?)", [
+        (1, "tests/test_core.py::test_run|run"),
+        (2, "tests/test_core.py::test_util[1]|run"),
+        (3, "tests/test_other.py::test_unlinked|run"),
+    ])
+    conn.executemany("INSERT INTO line_bits VALUES (?, ?, ?)", [
+        (1, 1, numbits(1, 3)),
+        (3, 1, numbits(1, 2)),
+        (1, 2, numbits(1, 4)),
+        (2, 2, numbits(1)),
+        (2, 3, numbits(1, 2)),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_parse_cobertura_skips_method_listings(tmp_path):
+    xml = tmp_path / "coverage.xml"
+    xml.write_text(COBERTURA)
+    sources, files = parse_cobertura(xml)
+    assert sources == ["/repo"]
+    assert files["pkg/core.py"] == (4, 3)
+    assert files["pkg/util.py"] == (2, 1)
+
+
+def test_numbits_join(tmp_path):
+    db = tmp_path / ".coverage"
+    write_db(db)
+    files = {"pkg/core.py": (4, 3), "pkg/util.py": (2, 1)}
+    by_requirement, by_interface = accumulate_context_lines(db, ["/repo"], files, INDEX)
+    assert by_requirement["REQ-1"] == {"pkg/core.py": bits(1, 3, 4), "pkg/util.py": bits(1)}
+    assert by_requirement["REQ-2"] == {"pkg/core.py": bits(1, 4), "pkg/util.py": bits(1)}
+    assert by_interface["Inventory"] == {"pkg/core.py": bits(1, 3)}
+
+def test_test_files_excluded(tmp_path):
+    xml = tmp_path / "coverage.xml"
+    xml.write_text(COBERTURA)
+    db = tmp_path / ".coverage"
+    write_db(db)
+    result = attribute_coverage(xml, db, INDEX)
+    assert result["line_rate"] == round(4 / 6, 3)
+    req_1 = next(row for row in result["by_requirement"] if row["id"] == "REQ-1")
+    assert req_1 == {"id": "REQ-1", "files": 2, "lines_covered": 4, "lines_total": 6, "rate": 0.667}
@@ -0,0 +1,78 @@
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from generate_manifest import generate_manifest, verify_artifact  # noqa: E402
+from merkle import build_levels, leaf_hash, proof_positions, verify_inclusion  # noqa: E402
+
+
+def inclusion_proof(levels, index):
+    nodes = [node for level in levels for node in level]
+    return [nodes[p].hex() for p in proof_positions(len(levels[0]), index)]
+
+
+def make_entries(count):
+    return [{"path": f"artifact-{i:04d}.json", "sha256": f"{i:064x}", "size": i} for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 7, 8, 13, 100])
+def test_inclusion_proof_round_trip(count):
+    entries = make_entries(count)
+    levels = build_levels([leaf_hash(e) for e in entries])
+    root = levels[-1][0].hex()
+    for i, entry in enumerate(entries):
+        assert verify_inclusion(entry, i, count, inclusion_proof(levels, i), root)
+
+
+@pytest.mark.parametrize("count", [2, 5, 8])
+def test_tampered_entry_rejected(count):
+    entries = make_entries(count)
+    levels = build_levels([leaf_hash(e) for e in entries])
+    root = levels[-1][0].hex()
+    for i, entry in enumerate(entries):
+        proof = inclusion_proof(levels, i)
+        assert not verify_inclusion({**entry, "sha256": "f" * 64}, i, count, proof, root)
+        assert not verify_inclusion(entry, (i + 1) % count, count, proof, root)
+        assert not verify_inclusion(entry, i, count, proof, "0" * 64)
+
+
+def test_verify_artifact_from_manifest(tmp_path):
+    artifacts = tmp_path / "artifacts"
+    (artifacts / "logs").mkdir(parents=True)
+    names = [f"logs/log-{i}.jsonl" for i in range(6)] + ["résumé.txt"]
+    for i, name in enumerate(names):
+        (artifacts / name).write_text(f'{{"n": {i}}}\n' * (i + 1))
+    manifest = tmp_path / "manifest.json"
+    generate_manifest(str(artifacts), str(manifest), merkle=True)
+
+    # Only the signed root and the sidecars are needed
+    manifest.unlink()
+    for name in names:
+        assert verify_artifact(str(manifest), str(artifacts), name)
+    assert not verify_artifact(str(manifest), str(artifacts), "logs/missing.jsonl")
+
+    (artifacts / "logs" / "log-3.jsonl").write_text("tampered\n")
+    assert not verify_artifact(str(manifest), str(artifacts), "logs/log-3.jsonl")
+
+
+def test_tampered_entries_file_rejected(tmp_path):
+    artifacts = tmp_path / "artifacts"
+    artifacts.mkdir()
+    for i in range(4):
+        (artifacts / f"a{i}.txt").write_text(str(i))
+    manifest = tmp_path / "manifest.json"
+    generate_manifest(str(artifacts), str(manifest), merkle=True)
+
+    # Swap in a matching hash for different content
+    (artifacts / "a1.txt").write_text("forged")
+    entries = Path(f"{manifest}.entries.jsonl")
+    lines = entries.read_bytes().split(b"\n")
+    forged = hashlib.sha256(b"forged").hexdigest().encode()
+    old = lines[1].split(b'"sha256":"')[1][:64]
+    lines[1] = lines[1].replace(old, forged)
+    entries.write_bytes(b"\n".join(lines))
+    assert not verify_artifact(str(manifest), str(artifacts), "a1.txt")
@@ -0,0 +1,87 @@
+import itertools
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from compute_quadrants import merge_counts, normalize_counts  # noqa: E402
+from process_shards import EMPTY_COUNTS, process_shards, shard_names, shard_roots  # noqa: E402
+from rerun_flaky import resolve  # noqa: E402
+
+
+SHARD_COUNTS = [
+    {"total": 3, "passed": 2, "quadrants": {"interface": 1, "requirement": 2},
+     "requirements": {"REQ-1": {"pass": 1, "fail": 1}}},
+    {"total": 2, "passed": 2, "quadrants": {"temporal": 2},
+     "requirements": {"REQ-1": {"pass": 1, "fail": 0}, "REQ-2": {"pass": 1, "fail": 0}}},
+    {"total": 4, "passed": 1, "quadrants": {"risk": 1, "requirement": 1},
+     "requirements": {"REQ-2": {"pass": 0, "fail": 1}}},
+]
+
+
+def test_merge_counts_is_associative_and_commutative():
+    a, b, c = SHARD_COUNTS
+    assert merge_counts(merge_counts(a, b), c) == merge_counts(a, merge_counts(b, c))
+    expected = normalize_counts(merge_counts(merge_counts(a, b), c))
+    for order in itertools.permutations(SHARD_COUNTS):
+        merged = EMPTY_COUNTS
+        for counts in order:
+            merged = merge_counts(merged, counts)
+        assert normalize_counts(merged) == expected
+    assert a == SHARD_COUNTS[0]  # Inputs are not mutated
+
+
+def test_shard_names(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    packages = [Path("packages/a/reports/junit.xml"), Path("packages/b/reports/junit.xml"),
+                Path("packages/c/sub/reports/junit.xml")]
+    same_dir = [Path("reports/junit-1.xml"), Path("reports/junit-2.xml")]
+    for path in packages + same_dir:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    roots = shard_roots(packages)
+    assert roots == [Path("packages/a"), Path("packages/b"), Path("packages/c/sub")]
+    assert shard_names(packages, roots) == ["packages/a", "packages/b", "packages/c/sub"]
+
+    roots = shard_roots(same_dir)
+    assert roots == [Path("."), Path(".")]
+    assert shard_names(same_dir, roots) == ["reports/junit-1", "reports/junit-2"]
+
+    assert shard_names(packages[:1], shard_roots(packages[:1])) == [""]
+
+
+def write_junit(path, outcome):
+    failure = '<failure message="boom"/>' if outcome == "fail" else ""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        '<testsuites><testsuite>'
+        f'<testcase classname="tests.test_smoke" name="test_addition">{failure}</testcase>'
+        '</testsuite></testsuites>'
+    )
+
+
+def test_same_test_in_two_packages_is_not_flaky(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_junit(Path("packages/a/reports/junit.xml"), "pass")
+    write_junit(Path("packages/b/reports/junit.xml"), "fail")
+    (tmp_path / "packages/b/tests").mkdir()
+    (tmp_path / "packages/b/tests/test_smoke.py").touch()
+
+    for _ in range(5):
+        result = process_shards(["packages/*/reports/junit.xml"], output_dir="out", workers=2)
+
+    assert result["flaky"] == {}
+    history = json.loads(Path("out/test_history.json").read_text())
+    assert history == {
+        "packages/a::tests.test_smoke.test_addition": ["pass"] * 5,
+        "packages/b::tests.test_smoke.test_addition": ["fail"] * 5,
+    }
+    assert set(result["quadrants"]["shards"]) == {"packages/a", "packages/b"}
+    assert not Path("reports").exists()
+
+    shards = json.loads(Path("out/shards.json").read_text())
+    assert resolve("packages/b::tests.test_smoke.test_addition", shards) == (
+        "tests/test_smoke.py::test_addition", Path("packages/b")
+    )
@@ -0,0 +1,96 @@
+import itertools
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import rerun_flaky  # noqa: E402
+from detect_flaky import detect_flaky  # noqa: E402
+from rerun_flaky import node_id, rerun, runs_to_settle, verdict  # noqa: E402
+
+
+SETTLE = runs_to_settle()
+
+
+def test_runs_to_settle():
+    # 0.7 ** 9 < 0.05 <= 0.7 ** 8
+    assert SETTLE == 9
+
+
+@pytest.mark.parametrize("outcomes, expected", [
+    ([], None),
+    (["pass"] * (SETTLE - 1), None),
+    (["pass"] * SETTLE, "pass"),
+    (["fail", "error"] + ["fail"] * (SETTLE - 2), "fail"),
+    (["fail", "pass"], "flaky"),
+    (["error", "pass"], "flaky"),
+    (["skip"] * SETTLE, None),
+    (["skip", "pass"] + ["pass"] * (SETTLE - 2), "pass"),
+])
+def test_verdict(outcomes, expected):
+    assert verdict(outcomes, SETTLE) == expected
+
+
+def test_node_id(tmp_path):
+    (tmp_path / "tests" / "unit").mkdir(parents=True)
+    (tmp_path / "tests" / "unit" / "test_mod.py").touch()
+    assert node_id("tests.unit.test_mod.test_plain", tmp_path) == "tests/unit/test_mod.py::test_plain"
+    assert node_id("tests.unit.test_mod.TestK.test_m", tmp_path) == "tests/unit/test_mod.py::TestK::test_m"
+    assert node_id("tests.unit.test_mod.test_p[1.5-a.b]", tmp_path) == "tests/unit/test_mod.py::test_p[1.5-a.b]"
+    assert node_id("tests.unit.test_mod.TestK.test_p[x.y]", tmp_path) == "tests/unit/test_mod.py::TestK::test_p[x.y]"
+    assert node_id("tests.missing.test_x", tmp_path) == "tests.missing.test_x"
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    """Replace subprocess reruns with scripted outcomes and count calls."""
+    scripts = {}
+    calls = {}
+    lock = threading.Lock()
+
+    def run_once(test_id, timeout=None, shards=None):
+        with lock:
+            calls[test_id] = calls.get(test_id, 0) + 1
+            return next(scripts[test_id])
+
+    monkeypatch.setattr(rerun_flaky, "run_once", run_once)
+    return scripts, calls
+
+
+@pytest.mark.parametrize("workers", [1, 4, 16])
+def test_rerun_stops_when_settled(fake_runs, workers):
+    scripts, calls = fake_runs
+    scripts["stable"] = itertools.repeat("pass")
+    scripts["broken"] = itertools.repeat("fail")
+    scripts["flaky"] = itertools.cycle(["pass", "fail"])
+    scripts["gone"] = itertools.repeat(None)
+
+    results = rerun(["stable", "broken", "flaky", "gone"], seeds={"broken": ["fail"]}, workers=workers)
+
+    assert results["stable"]["verdict"] == "pass"
+    assert calls["stable"] == SETTLE
+    assert results["broken"]["verdict"] == "fail"
+    assert calls["broken"] == SETTLE - 1  # The seeded failure counts
+    assert results["flaky"]["verdict"] == "flaky"
+    assert calls["flaky"] <= min(workers, SETTLE) + 1
+    assert results["gone"]["verdict"] == "unrunnable"
+    assert calls["gone"] <= workers
+
+
+def test_rerun_verdict_feeds_detect_flaky():
+    history = {"t": ["pass", "fail", "pass", "fail", "pass"]}
+    assert "t" in detect_flaky(history)
+
+    # Rerun proved it stable: no longer flagged, and one new run is not enough to re-flag
+    stable = {"t": {"verdict": "pass", "flakiness": 0.0, "history": list(history["t"])}}
+    assert "t" not in detect_flaky(history, stable)
+    assert "t" not in detect_flaky({"t": [*history["t"], "pass"]}, stable)
+    assert "t" in detect_flaky({"t": [*history["t"], "fail", "pass", "fail"][-10:]}, stable)
+
+    # A confirmed flake stays flagged even once the history looks clean
+    clean = {"t": ["pass"] * 6}
+    flaky = {"t": {"verdict": "flaky", "flakiness": 0.5, "history": list(clean["t"])}}
+    assert detect_flaky(clean, flaky) == {"t": 0.5}
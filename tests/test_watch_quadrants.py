@@ -0,0 +1,65 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from compute_quadrants import compute_quadrants  # noqa: E402
+from watch_quadrants import JunitTail, LiveQuadrants  # noqa: E402
+
+
+def case(name, outcome="pass", requirement=None):
+    props = (
+        f'<properties><property name="requirement_id" value="{requirement}"/></properties>'
+        if requirement else ""
+    )
+    failure = '<failure message="boom"/>' if outcome == "fail" else ""
+    return f'<testcase classname="tests.test_timing" name="{name}">{props}{failure}</testcase>'
+
+
+def junit(*cases):
+    return f'<?xml version="1.0"?><testsuites><testsuite name="pytest">{"".join(cases)}</testsuite></testsuites>'
+
+
+def test_partial_write_matches_compute_quadrants(tmp_path):
+    path = tmp_path / "junit.xml"
+    document = junit(
+        case("test_latency", requirement="S02P02-TIME-003"),
+        case("test_interface_schema", "fail", requirement="S02P01-INV-001"),
+        case("test_plain"),
+    ).encode()
+    live = LiveQuadrants()
+    tail = JunitTail(path)
+
+    cut = document.index(b"test_interface_schema") + 5
+    path.write_bytes(document[:cut])
+    assert tail.poll(live) == 1
+    with path.open("ab") as f:
+        f.write(document[cut:])
+    assert tail.poll(live) == 2
+
+    snapshot = live.snapshot()
+    snapshot.pop("flaky")
+    assert snapshot == compute_quadrants(str(path))
+
+
+def test_rewritten_file_is_reparsed(tmp_path):
+    path = tmp_path / "junit.xml"
+    live = LiveQuadrants()
+    tail = JunitTail(path)
+
+    path.write_text(junit(case("test_a")))
+    assert tail.poll(live) == 1
+
+    # pytest rerun overwrites junit.xml in place with a larger document
+    path.write_text(junit(case("test_a"), case("test_b", "fail")))
+    assert tail.poll(live) == 2
+    assert not tail.ignored and live.total == 3
+
+    # Same size, different content, new inode
+    replacement = tmp_path / "junit.xml.new"
+    replacement.write_text(junit(case("test_a"), case("test_c", "fail")))
+    os.replace(replacement, path)
+    assert tail.poll(live) == 2
+    assert live.total == 5
+    assert tail.poll(live) == 0